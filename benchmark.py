@@ -0,0 +1,203 @@
+# Times the decisions made by the card player on random deals, for a range of
+# hand sizes, to check that the time per decision stays bounded as hands get
+# larger. Also times how long the package takes to import, which is paid by
+# every worker process. Run with: python benchmark.py [hand sizes ...]
+#
+# With --memory, the decisions are run under the memory probe instead, and
+# the allocations of each solver are reported. The run fails if a call to
+# phazed_play allocates more than the budget (--budget, in KB) at its peak.
+#
+# With --prefilter, each phase is solved on random hands with the prefilters
+# on and off, and the share of hands they reject and the time they save are
+# reported.
+
+import argparse
+import os
+import random
+import subprocess
+import sys
+import time
+import phazed
+from phazed.constants import *
+from phazed.rules import RULES, configure
+from phazed.large_hand import large_hand_phase
+from phazed.odds import load_odds
+from phazed.player import find_phase
+from phazed.prefilter import (enable_prefilter, prefilter_stats,
+                              reset_prefilter_stats)
+from phazed.memory import (enable_probe, disable_probe, reset_probe,
+                           probe_stats, probe_report)
+
+HAND_SIZES = [10, 20, 40, 60]
+NUM_DEALS = 50
+NUM_PLAYERS = 4
+SEED = 10001
+IMPORT_RUNS = 5
+MEMORY_BUDGET_KB = 256  # the most a single decision may allocate at once
+# imports timed at start up, from the cheapest to the whole player
+IMPORTS = ['import phazed', 'from phazed import phazed_phase_type',
+           'from phazed import phazed_is_valid_play',
+           'from phazed import phazed_play']
+
+
+def time_import(statement, runs=IMPORT_RUNS):
+    '''Times `statement` in a fresh interpreter, as a worker process would
+    run it on start up. Returns the best of `runs` times in milliseconds.'''
+    code = ('import time; start = time.perf_counter(); {}; '
+            'print(time.perf_counter() - start)').format(statement)
+    here = os.path.dirname(os.path.abspath(__file__))
+    times = [float(subprocess.check_output([sys.executable, '-c', code],
+                                           cwd=here)) * 1000
+             for _ in range(runs)]
+    return min(times)
+
+
+def full_deck():
+    '''Returns every card in the decks in use.'''
+    return [value + suit for value in CARD_VALUES for suit in SUITS
+            for _ in range(RULES.num_decks)]
+
+
+def random_state(rng, hand_size):
+    '''Deals a random position where player 0 has just picked up a card, and
+    returns the arguments to `phazed_play`. Some of the players (player 0
+    included) already have their phase on the table.'''
+    deck = full_deck()
+    rng.shuffle(deck)
+    table = []
+    phase_status = []
+    for player in range(NUM_PLAYERS):
+        hand = [deck.pop() for _ in range(hand_size)]
+        phase = rng.randint(1, 7)
+        play = large_hand_phase(phase, hand) if rng.random() < 0.5 else False
+        if play:
+            table.append((phase, play))
+            for group in play:
+                for card in group:
+                    hand.remove(card)
+        else:
+            table.append((None, []))
+        phase_status.append(phase - 1)
+        if player == 0:
+            my_hand = hand + [deck.pop()]
+    turn_history = [(0, [(PLAY_ONE, None)])]
+    return 0, table, turn_history, phase_status, my_hand, deck.pop()
+
+
+def random_states(hand_size, num_deals=NUM_DEALS, seed=SEED):
+    '''Sets the rules up for `hand_size` and returns `num_deals` random
+    positions from `random_state`.'''
+    # enough decks to deal every player a hand, with cards to spare
+    num_decks = max(NUM_DECKS, -(-(NUM_PLAYERS * hand_size * 2) // 52))
+    configure(hand_size=hand_size, num_decks=num_decks)
+    rng = random.Random(seed)
+    return [random_state(rng, hand_size) for _ in range(num_deals)]
+
+
+def time_decisions(hand_size, num_deals=NUM_DEALS, seed=SEED):
+    '''Times `phazed_play` on `num_deals` random positions. Returns the mean
+    and worst time per decision in milliseconds.'''
+    times = []
+    for state in random_states(hand_size, num_deals, seed):
+        start = time.perf_counter()
+        phazed.phazed_play(*state)
+        times.append((time.perf_counter() - start) * 1000)
+    return sum(times) / len(times), max(times)
+
+
+def check_memory(hand_sizes, budget_kb=MEMORY_BUDGET_KB):
+    '''Runs the decisions for each hand size under the memory probe and
+    prints what was allocated. Returns False if any call to phazed_play went
+    over `budget_kb` at its peak.'''
+    within_budget = True
+    enable_probe()
+    try:
+        for hand_size in hand_sizes:
+            states = random_states(hand_size)
+            # dealing calls the solvers too, and the odds tables are read
+            # once for the rules in use; neither is counted
+            load_odds()
+            reset_probe()
+            for state in states:
+                phazed.phazed_play(*state)
+            peak = probe_stats()['phazed_play'].max_peak / 1024
+            verdict = 'ok' if peak <= budget_kb else 'OVER BUDGET'
+            within_budget = within_budget and peak <= budget_kb
+            print('hand size {}: peak {:.1f} KB of {} KB, {}'.format(
+                hand_size, peak, budget_kb, verdict))
+            print(probe_report())
+            print()
+    finally:
+        disable_probe()
+    return within_budget
+
+
+def time_prefilter(hand_size, num_hands=NUM_DEALS * 10, seed=SEED):
+    '''Solves every phase on `num_hands` random hands of `hand_size`, with
+    the prefilters on and then off. Returns rows of (phase, share of hands
+    rejected, ms with the prefilters, ms without). The share is None for
+    hands the prefilters don't check.'''
+    num_decks = max(NUM_DECKS, -(-(hand_size * 2) // 52))
+    configure(hand_size=hand_size, num_decks=num_decks)
+    rng = random.Random(seed)
+    deck = full_deck()
+    hands = [rng.sample(deck, hand_size) for _ in range(num_hands)]
+    rows = []
+    try:
+        for phase in range(PHASE_ONE, PHASE_SEVEN + 1):
+            times = []
+            for enabled in (True, False):
+                enable_prefilter(enabled)
+                reset_prefilter_stats()
+                start = time.perf_counter()
+                for hand in hands:
+                    find_phase(phase, hand)
+                times.append((time.perf_counter() - start) * 1000)
+                if enabled:
+                    checked, rejected = prefilter_stats()
+            share = rejected / checked if checked else None
+            rows.append((phase, share, times[0], times[1]))
+    finally:
+        enable_prefilter()
+    return rows
+
+
+def check_prefilter(hand_sizes):
+    '''Prints what the prefilters reject and save for each hand size.'''
+    for hand_size in hand_sizes:
+        print('hand size {}'.format(hand_size))
+        print('phase  rejected     on ms    off ms   saved')
+        for phase, share, on, off in time_prefilter(hand_size):
+            print('{:>5} {:>9} {:>9.1f} {:>9.1f} {:>7.1%}'.format(
+                phase, '-' if share is None else '{:.1%}'.format(share),
+                on, off, 1 - on / off if off else 0))
+        print()
+
+
+def main(hand_sizes):
+    print('import time ms')
+    for statement in IMPORTS:
+        print('{:>9.2f}  {}'.format(time_import(statement), statement))
+    print()
+    print('hand size   mean ms    max ms')
+    for hand_size in hand_sizes:
+        mean, worst = time_decisions(hand_size)
+        print('{:>9} {:>9.2f} {:>9.2f}'.format(hand_size, mean, worst))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('hand_sizes', type=int, nargs='*', default=HAND_SIZES)
+    parser.add_argument('--memory', action='store_true',
+                        help='check allocations instead of timing')
+    parser.add_argument('--budget', type=float, default=MEMORY_BUDGET_KB,
+                        help='allocation budget per decision, in KB')
+    parser.add_argument('--prefilter', action='store_true',
+                        help='measure the prefilters instead of timing')
+    args = parser.parse_args()
+    if args.memory:
+        sys.exit(0 if check_memory(args.hand_sizes, args.budget) else 1)
+    if args.prefilter:
+        check_prefilter(args.hand_sizes)
+        sys.exit(0)
+    main(args.hand_sizes)
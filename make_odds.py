@@ -0,0 +1,20 @@
+# Builds the table of the odds of completing each phase within 1 to 5 draws,
+# used by phazed.odds, for the rules in use. The table only has to be rebuilt
+# when the rules change. Run with: python make_odds.py [output path]
+
+import sys
+import time
+from phazed.odds import ODDS_PATH, build_odds, save_odds
+
+
+def main(path):
+    start = time.perf_counter()
+    tables = build_odds()
+    save_odds(tables, path)
+    num_states = sum(len(odds) for sizes, odds in tables.values())
+    print('{} entries for {} phases written to {} in {:.1f} s'.format(
+        num_states, len(tables), path, time.perf_counter() - start))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1] if len(sys.argv) > 1 else ODDS_PATH)
@@ -0,0 +1,47 @@
+# The phazed card player. The public functions are loaded on first use rather
+# than on import, so that processes which only need part of the package (such
+# as the workers that score candidate plays) start quickly.
+#
+#   from phazed import phazed_play, phazed_is_valid_play, phazed_phase_type
+
+import importlib
+
+# public name -> module it is defined in
+_EXPORTS = {
+    'phazed_play': 'player',
+    'phazed_is_valid_play': 'valid_play',
+    'phazed_phase_type': 'phase_type',
+    'configure': 'rules',
+    'RULES': 'rules',
+    'configure_strategy': 'strategy',
+    'STRATEGY': 'strategy',
+    'InvalidPlayError': 'validation',
+    'configure_checks': 'validation',
+    'configure_pool': 'parallel',
+    'create_shared_cache': 'shared_cache',
+    'completion_odds': 'odds',
+    'configure_capture': 'capture',
+    'stop_capture': 'capture',
+    'enable_probe': 'memory',
+    'disable_probe': 'memory',
+    'probe_report': 'memory',
+    'enable_prefilter': 'prefilter',
+    'prefilter_stats': 'prefilter',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    '''Imports the module that defines `name` the first time it is used.'''
+    if name not in _EXPORTS:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(
+            __name__, name))
+    value = getattr(importlib.import_module('.' + _EXPORTS[name], __name__),
+                    name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,70 @@
+# Contains functions that map a hand to a canonical form, so that hands which
+# are the same up to a change of suits share one entry in the solver caches.
+# Phases 1, 3, 4 and 5 don't depend on suits at all. Phase 2 only needs cards
+# of one suit, so any relabelling of the suits gives an equivalent hand, and
+# phases 6 and 7 only depend on colour, where red and black can be swapped.
+# The solvers for phases 6 and 7 put an Ace with the cards of its own colour,
+# so there Aces keep their colour too.
+
+from collections import defaultdict as dd
+from .constants import *
+
+# the suits that canonical cards are given, in order
+CANONICAL_SUITS = 'SHDC'
+
+
+def canonical_hand(hand, phase):
+    '''Returns a 2 tuple of the canonical hand for `phase` (a sorted tuple of
+    cards), and a dictionary mapping each canonical card to the list of real
+    cards in `hand` it stands for.'''
+    if phase in (PHASE_ONE, PHASE_THREE, PHASE_FOUR, PHASE_FIVE):
+        relabel = {suit: CANONICAL_SUITS[0] for suit in SUITS}
+    elif phase == PHASE_TWO:
+        relabel = _relabel(hand, [suit for suit in SUITS])
+    else:
+        # cards only differ by colour: one colour is called spades (black)
+        # and the other hearts (red), whichever sorts first
+        relabel = _relabel(hand, [BLACK, RED])
+    wild_colour = phase in (PHASE_SIX, PHASE_SEVEN)
+    real_cards = dd(list)
+    for card in hand:
+        real_cards[_canonical_card(card, relabel, wild_colour)].append(card)
+    canon = tuple(sorted(_canonical_card(card, relabel, wild_colour)
+                         for card in hand))
+    return canon, real_cards
+
+
+def _canonical_card(card, relabel, wild_colour=False):
+    '''Returns the canonical card for `card`. Unless `wild_colour`, the suit
+    of a wild card doesn't matter, so all wilds share one suit.'''
+    if card[0] == 'A' and not wild_colour:
+        return 'A' + CANONICAL_SUITS[0]
+    return card[0] + relabel[card[1]]
+
+
+def _relabel(hand, classes):
+    '''Returns a dictionary mapping each suit to a canonical suit. `classes`
+    are the groups of suits that are told apart (single suits, or colours).
+    Each class is described by the sorted values of the natural cards in it,
+    and classes are given canonical suits in order of that description, so
+    hands that only differ by a relabelling of the classes agree.'''
+    values = {suit_class: sorted(card[0] for card in hand
+                                 if card[1] in suit_class and card[0] != 'A')
+              for suit_class in classes}
+    ordered = sorted(classes, key=lambda x: (len(values[x]), values[x]),
+                     reverse=True)
+    relabel = {}
+    for i in range(len(ordered)):
+        for suit in ordered[i]:
+            relabel[suit] = CANONICAL_SUITS[i]
+    return relabel
+
+
+def restore_play(play, real_cards):
+    '''Takes a play found for the canonical hand, and returns the same play
+    with real cards from the hand, using the mapping from `canonical_hand`.
+    Returns False if `play` is False.'''
+    if not play:
+        return False
+    unused = {card: list(cards) for card, cards in real_cards.items()}
+    return [[unused[card].pop() for card in group] for group in play]
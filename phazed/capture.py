@@ -0,0 +1,171 @@
+# Contains the capture hook for phazed_play. Once `configure_capture` has
+# been called, every call that takes longer than the threshold, and a random
+# sample of the other calls, is written to a ring buffer file: the arguments,
+# the rules and strategy in use, the play made and the time taken. The file
+# has a fixed number of fixed size slots, and the oldest record is written
+# over when it is full, so it never grows. replay.py runs the captured calls
+# again under cProfile.
+#
+# Each process should capture to its own file; a '{pid}' in the path is
+# replaced by the process id.
+
+import os
+import random
+import struct
+import time
+import zlib
+from functools import wraps
+from .rules import RULES
+from .strategy import STRATEGY
+
+THRESHOLD_MS = 50.0  # calls slower than this are always captured
+NUM_SLOTS = 256
+SLOT_SIZE = 2 ** 14  # bytes per record, records that don't fit are dropped
+MAGIC = b'PHZC'
+FORMAT_VERSION = 1
+# magic, format version, slot size, number of slots, next slot, records
+# written, records dropped
+HEADER = struct.Struct('<4sHIIIQQ')
+LENGTH = struct.Struct('<I')
+SLOW = 'slow'
+SAMPLED = 'sampled'
+
+_buffer = None  # the CaptureBuffer in use, if capturing
+_threshold = THRESHOLD_MS
+_sample_rate = 0.0
+_rng = random.Random()
+
+
+class CaptureBuffer:
+    '''A ring buffer of records in a file. A file with the same geometry is
+    carried on from where it was left, so a restarted process keeps the
+    records of the last one.'''
+    def __init__(self, path, num_slots=NUM_SLOTS, slot_size=SLOT_SIZE):
+        self.path = path
+        self.num_slots = num_slots
+        self.slot_size = slot_size
+        self.next_slot = self.written = self.dropped = 0
+        if os.path.exists(path):
+            self.file = open(path, 'r+b')
+            header = self.file.read(HEADER.size)
+            if (len(header) == HEADER.size and
+                    HEADER.unpack(header)[:4] ==
+                    (MAGIC, FORMAT_VERSION, slot_size, num_slots)):
+                self.next_slot, self.written, self.dropped = \
+                    HEADER.unpack(header)[4:]
+                return
+            self.file.close()
+        self.file = open(path, 'w+b')
+        self.file.truncate(HEADER.size + num_slots * slot_size)
+        self._write_header()
+
+    def add(self, record):
+        '''Writes `record` (a dictionary of Python literals) over the oldest
+        slot. Returns False if it was too large to store.'''
+        data = zlib.compress(repr(record).encode())
+        if LENGTH.size + len(data) > self.slot_size:
+            self.dropped += 1
+            self._write_header()
+            return False
+        self.file.seek(HEADER.size + self.next_slot * self.slot_size)
+        self.file.write(LENGTH.pack(len(data)) + data)
+        self.next_slot = (self.next_slot + 1) % self.num_slots
+        self.written += 1
+        self._write_header()
+        return True
+
+    def close(self):
+        self.file.close()
+
+    def _write_header(self):
+        self.file.seek(0)
+        self.file.write(HEADER.pack(MAGIC, FORMAT_VERSION, self.slot_size,
+                                    self.num_slots, self.next_slot,
+                                    self.written, self.dropped))
+        self.file.flush()
+
+
+def read_capture(path):
+    '''Returns the records in the capture file at `path`, oldest first.'''
+    # only replays read captures, so the players don't pay for importing ast
+    from ast import literal_eval
+    with open(path, 'rb') as file:
+        data = file.read()
+    (magic, version, slot_size, num_slots, next_slot, written,
+     _) = HEADER.unpack_from(data)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError('{} is not a capture file'.format(path))
+    records = []
+    used = min(written, num_slots)
+    for i in range(used):
+        slot = (next_slot - used + i) % num_slots
+        offset = HEADER.size + slot * slot_size
+        length = LENGTH.unpack_from(data, offset)[0]
+        start = offset + LENGTH.size
+        records.append(literal_eval(
+            zlib.decompress(data[start:start + length]).decode()))
+    return records
+
+
+def configure_capture(path, threshold_ms=THRESHOLD_MS, sample_rate=0.0,
+                      num_slots=NUM_SLOTS, slot_size=SLOT_SIZE, seed=None):
+    '''Starts capturing phazed_play calls to the file at `path`: every call
+    slower than `threshold_ms`, and a random `sample_rate` fraction of the
+    others.'''
+    global _buffer, _threshold, _sample_rate
+    stop_capture()
+    _threshold = threshold_ms
+    _sample_rate = sample_rate
+    _rng.seed(seed)
+    _buffer = CaptureBuffer(path.format(pid=os.getpid()), num_slots,
+                            slot_size)
+    return _buffer
+
+
+def stop_capture():
+    '''Stops capturing and closes the capture file.'''
+    global _buffer
+    if _buffer is not None:
+        _buffer.close()
+        _buffer = None
+
+
+def captured(function):
+    '''Marks `function` (phazed_play) to have its calls captured.'''
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        if _buffer is None:
+            return function(*args, **kwargs)
+        result = None
+        start = time.perf_counter()
+        try:
+            result = function(*args, **kwargs)
+            return result
+        except Exception as error:
+            result = error
+            raise
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            if elapsed > _threshold:
+                _record(function, args, kwargs, result, elapsed, SLOW)
+            elif _sample_rate and _rng.random() < _sample_rate:
+                _record(function, args, kwargs, result, elapsed, SAMPLED)
+    return wrapper
+
+
+def _record(function, args, kwargs, result, elapsed, reason):
+    '''Writes one call to the capture file. Keyword arguments are stored by
+    position, so that every record can be replayed as function(*args).'''
+    if kwargs:
+        import inspect
+        args = inspect.signature(function).bind(*args, **kwargs).args
+    _buffer.add({
+        'args': args,
+        'result': result if isinstance(result, tuple) else repr(result),
+        'elapsed_ms': elapsed,
+        'reason': reason,
+        'time': time.time(),
+        'rules': {name: value for name, value in vars(RULES).items()
+                  if name != 'version'},
+        'strategy': vars(STRATEGY),
+    })
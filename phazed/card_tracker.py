@@ -0,0 +1,162 @@
+# Contains the card tracker, which keeps track of which cards are still live
+# (not yet seen on the table or the discard pile) during a hand. The tracker
+# is updated with only the plays that are new in turn_history, so the cost of
+# a turn does not grow with the length of the hand.
+
+from collections import defaultdict as dd
+
+from .constants import *
+from .rules import RULES
+
+
+class CardTracker:
+    '''Keeps the number of unseen copies of every card, the cards each player
+    has picked up from the discard pile, and the phase each player has put on
+    the table in the current hand.'''
+    def __init__(self, player_id, num_decks=None):
+        self.player_id = player_id
+        self.decks = num_decks  # None follows the rules in use
+        self.reset()
+
+    def reset(self):
+        '''Forgets everything, ready for a new hand. The number of decks is
+        read from the rules here, in case they changed since the last hand.'''
+        self.num_decks = self.decks
+        if self.num_decks is None:
+            self.num_decks = RULES.num_decks
+        self.unseen = {value + suit: self.num_decks
+                       for value in CARD_VALUES for suit in SUITS}
+        self.num_unseen = len(self.unseen) * self.num_decks
+        self.picked_up = dd(list)
+        # player_id -> the phase that player put down in this hand. Unlike
+        # phase_status, players who haven't put one down yet aren't in it
+        self.phases_this_hand = {}
+        self.first_turn = None
+        self.last_turn = None  # the last turn read, as far as it was read
+        self.num_turns = 0  # number of turns in turn_history already read
+        self.num_plays = 0  # number of plays read from the last of those turns
+
+    def update(self, turn_history):
+        '''Reads the plays in `turn_history` that have not been read yet. A
+        turn_history that does not continue the one already read (another
+        game, or a new hand) is read from the start.'''
+        if not turn_history:
+            self.reset()
+            return
+        if not self.continues(turn_history):
+            self.reset()
+        self.first_turn = (turn_history[0][0], turn_history[0][1][:1])
+
+        # the last turn read may have had more plays added to it since
+        start = max(self.num_turns - 1, 0)
+        for i in range(start, len(turn_history)):
+            player_id, plays = turn_history[i]
+            first_play = self.num_plays if i == self.num_turns - 1 else 0
+            for play in plays[first_play:]:
+                self.see_play(player_id, play)
+            self.num_plays = len(plays)
+        self.num_turns = len(turn_history)
+        self.last_turn = (player_id, plays[:self.num_plays])
+
+    def continues(self, turn_history):
+        '''Returns True if `turn_history` starts with the plays already read.
+        Only the first and the last turn read are compared, as a different
+        game or hand almost always differs in one of them.'''
+        if self.num_turns == 0:
+            return True
+        if len(turn_history) < self.num_turns:
+            return False
+        player_id, plays = turn_history[self.num_turns - 1]
+        return ((turn_history[0][0], turn_history[0][1][:1]) ==
+                self.first_turn and
+                (player_id, plays[:self.num_plays]) == self.last_turn)
+
+    def see_play(self, player_id, play):
+        '''Updates the tracker with a single play made by `player_id`.'''
+        play_type = play[0]
+        if play_type == PLAY_TWO:
+            # the card was already seen when it was discarded
+            self.picked_up[player_id].append(play[1])
+        elif play_type == PLAY_THREE:
+            self.phases_this_hand[player_id] = play[1][0]
+            for group in play[1][1]:
+                for card in group:
+                    self.see_card(player_id, card)
+        elif play_type == PLAY_FOUR or play_type == PLAY_FIVE:
+            card = play[1] if play_type == PLAY_FIVE else play[1][0]
+            self.see_card(player_id, card)
+
+    def see_card(self, player_id, card):
+        '''Marks `card` as seen, after `player_id` played it face up. A card
+        the player picked up from the discard pile is only seen once.'''
+        if card in self.picked_up[player_id]:
+            self.picked_up[player_id].remove(card)
+            return
+        if self.unseen[card] > 0:
+            self.unseen[card] -= 1
+            self.num_unseen -= 1
+
+    def hidden_hand(self, hand):
+        '''Returns the cards in `hand` that are still counted as unseen, that
+        is, all but the ones this player picked up from the discard pile.'''
+        hidden = list(hand)
+        for card in self.picked_up[self.player_id]:
+            if card in hidden:
+                hidden.remove(card)
+        return hidden
+
+    def unseen_count(self, value=None, suit=None, hand=()):
+        '''Returns the number of unseen cards with the given `value` and/or
+        `suit` (either can be None to mean any), leaving out the cards in this
+        player's `hand`.'''
+        count = 0
+        for card, num in self.unseen.items():
+            if ((value is None or card[0] == value) and
+                (suit is None or card[1] == suit)):
+                count += num
+        for card in self.hidden_hand(hand):
+            if ((value is None or card[0] == value) and
+                (suit is None or card[1] == suit)):
+                count -= 1
+        return max(count, 0)
+
+    def draw_probability(self, value=None, suit=None, hand=()):
+        '''Returns the probability that the next card drawn from the deck has
+        the given `value` and/or `suit`, assuming every card not in `hand` and
+        not yet seen is equally likely to be drawn.'''
+        total = self.num_unseen - len(self.hidden_hand(hand))
+        if total <= 0:
+            return 0
+        return self.unseen_count(value, suit, hand) / total
+
+    def draw_distribution(self, hand=()):
+        '''Returns a dictionary mapping each card that could be drawn next to
+        the probability of drawing it, as in `draw_probability`.'''
+        counts = self.unseen.copy()
+        for card in self.hidden_hand(hand):
+            if counts.get(card, 0) > 0:
+                counts[card] -= 1
+        total = sum(counts.values())
+        if not total:
+            return {}
+        return {card: num / total for card, num in counts.items() if num}
+
+    def wanted_values(self):
+        '''Returns the set of card values that the other players have picked
+        up from the discard pile and still hold.'''
+        return {card[0] for player, cards in self.picked_up.items()
+                if player != self.player_id for card in cards}
+
+
+# one tracker per player, so that several players can share a process
+_trackers = {}
+
+
+def card_tracker(player_id, turn_history):
+    '''Returns the tracker for `player_id`, brought up to date with
+    `turn_history`.'''
+    if player_id not in _trackers:
+        _trackers[player_id] = CardTracker(player_id)
+    tracker = _trackers[player_id]
+    tracker.update(turn_history)
+    return tracker
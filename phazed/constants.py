@@ -0,0 +1,27 @@
+# Contains the constants shared by the card player modules
+
+PLAY_ONE = 1
+PLAY_TWO = 2
+PLAY_THREE = 3
+PLAY_FOUR = 4
+PLAY_FIVE = 5  # the PLAYs indicate the type of play
+PHASE_ONE = 1
+PHASE_TWO = 2
+PHASE_THREE = 3
+PHASE_FOUR = 4
+PHASE_FIVE = 5
+PHASE_SIX = 6
+PHASE_SEVEN = 7
+CARD_VALUES = {'A': 1, '2': 2, '3': 3, '4': 4, '5': 5, '6': 6, '7': 7, '8': 8, 
+               '9': 9, '0': 10, 'J': 11, 'Q': 12, 'K': 13}
+RED = 'HD'     # HD - hearts and diamonds
+BLACK = 'CS'   # CS - clubs and spades
+SUITS = 'SHDC'
+MIN_NATURAL = 2  # min number of natural cards in a play (except accumulations)
+MAX_RUN = 12
+ACCUMULATION_SEQUENCE = [34, 55, 68, 76, 81, 84, 86, 87, 88]
+ACCUM_34 = 34
+RUN_ORDER = '234567890JQK'  # order of the natural values in a run (cycles)
+MAX_CARD = 13  # the largest card value
+NUM_DECKS = 2  # the game is played with two standard decks
+HAND_SIZE = 10
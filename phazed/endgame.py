@@ -0,0 +1,243 @@
+# Contains the endgame search, which is used once our phase is on the table.
+# It looks for the sequence of plays to the table that either empties the hand
+# this turn, or leaves the fewest points in the hand once we discard.
+
+from functools import lru_cache
+from .constants import *
+from .rules import RULES
+from .memory import probed
+
+NO_PLAY = float('inf')  # score of a position where we can't end the turn
+CACHE_SIZE = 2 ** 16
+
+# group summaries are tuples that start with one of these kinds
+SAME_VALUE = 'value'
+SAME_SUIT = 'suit'
+RUN = 'run'
+ACCUMULATION = 'accum'
+
+
+@probed
+def best_table_plays(hand, table):
+    '''Returns a 2 tuple of the fewest points we can be left with at the end
+    of the turn, and the list of table plays (play type 4) that gets there. The
+    points are None if there is no way to end the turn.'''
+    positions, summaries = table_summary(table)
+    if len(hand) > RULES.large_hand:
+        points, moves = _greedy(hand, summaries)
+    else:
+        points, moves = _search(tuple(sorted(hand)), summaries, RULES.version)
+    if points == NO_PLAY:
+        return None, []
+
+    # turn the moves back into plays, replaying them on the real group lengths
+    lengths = [len(table[i][1][j]) for i, j in positions]
+    plays = []
+    for card, group, front in moves:
+        index = 0 if front else lengths[group]
+        lengths[group] += 1
+        player, group_num = positions[group]
+        plays.append((PLAY_FOUR, (card, (player, group_num, index))))
+    return points, plays
+
+
+def table_summary(table):
+    '''Summarises each group on the table down to what decides which cards can
+    be played on it. Returns the list of (player, group) positions and the
+    tuple of summaries in the same order.'''
+    positions = []
+    summaries = []
+    for i in range(len(table)):
+        target_phase, groups = table[i]
+        if not target_phase:
+            continue
+        for j in range(len(groups)):
+            positions.append((i, j))
+            summaries.append(group_summary(groups[j], target_phase, j))
+    return positions, tuple(summaries)
+
+
+def group_summary(group, target_phase, group_num):
+    '''Summarises a single group of cards on the table.'''
+    naturals = [card for card in group if card[0] != 'A']
+    if (target_phase == PHASE_ONE or target_phase == PHASE_FOUR or
+        target_phase == PHASE_SEVEN and group_num == 1):
+        return (SAME_VALUE, naturals[0][0] if naturals else None)
+    if target_phase == PHASE_TWO:
+        return (SAME_SUIT, naturals[0][1] if naturals else None)
+    colour = None
+    if target_phase == PHASE_SIX or target_phase == PHASE_SEVEN:
+        if naturals:
+            colour = RED if naturals[0][1] in RED else BLACK
+        else:
+            colour = ''  # no natural card yet, any colour can follow
+    if target_phase == PHASE_THREE or target_phase == PHASE_SIX:
+        total = sum(CARD_VALUES[card[0]] for card in group)
+        return (ACCUMULATION, total, colour)
+    # a run: work out the position in RUN_ORDER of its first card
+    for k in range(len(group)):
+        if group[k][0] != 'A':
+            start = (RUN_ORDER.index(group[k][0]) - k) % len(RUN_ORDER)
+            return (RUN, start, len(group), colour)
+    return (RUN, None, len(group), colour)
+
+
+def play_on_group(summary, card, front, last_card):
+    '''Returns the summary of the group once `card` is played on it (at the
+    front of a run if `front`), or None if the play is not allowed.
+    `last_card` says whether it is the last card in hand.'''
+    kind = summary[0]
+    value, suit = card[0], card[1]
+    wild = value == 'A'
+    if kind == SAME_VALUE or kind == SAME_SUIT:
+        if front:
+            return None
+        attr = value if kind == SAME_VALUE else suit
+        if wild:
+            return summary
+        if summary[1] is None:
+            return (kind, attr)
+        if summary[1] == attr:
+            return summary
+        return None
+
+    colour = summary[-1]
+    if colour and not wild and suit not in colour:
+        return None
+    if colour == '' and not wild:
+        colour = RED if suit in RED else BLACK
+
+    if kind == ACCUMULATION:
+        if front:
+            return None
+        total = summary[1]
+        next_accums = [x for x in RULES.accumulation_sequence if x > total]
+        if not next_accums:
+            return None
+        new_total = total + CARD_VALUES[value]
+        if new_total > next_accums[0]:
+            return None
+        if last_card and new_total != next_accums[0]:
+            return None
+        return (ACCUMULATION, new_total, colour)
+
+    # a run, which can only be extended at the front or the end
+    start, length = summary[1], summary[2]
+    if length >= RULES.max_run:
+        return None
+    num_values = len(RUN_ORDER)
+    if start is None:
+        # only wilds so far, so the first natural card fixes the start
+        if wild:
+            return (RUN, None, length + 1, colour)
+        if front:
+            return (RUN, RUN_ORDER.index(value), length + 1, colour)
+        start = (RUN_ORDER.index(value) - length) % num_values
+    if front:
+        new_start = (start - 1) % num_values
+        needed = new_start
+    else:
+        new_start = start
+        needed = (start + length) % num_values
+    if not wild and RUN_ORDER.index(value) != needed:
+        return None
+    return (RUN, new_start, length + 1, colour)
+
+
+def can_discard(summaries):
+    '''Checks that every accumulation on the table is complete, which has to
+    be true before the turn can end with a discard.'''
+    for summary in summaries:
+        if (summary[0] == ACCUMULATION and
+            summary[1] not in RULES.accumulation_sequence):
+            return False
+    return True
+
+
+def hand_points(hand):
+    '''Returns the points left in `hand` once the highest scoring card in it
+    has been discarded.'''
+    if not hand:
+        return 0
+    points = [CARD_VALUES[card[0]] for card in hand]
+    return sum(points) - max(points)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _search(hand, summaries, rules_version):
+    '''Depth first search over the table plays from the position (`hand`,
+    `summaries`). Both are canonical tuples, so positions reached through
+    plays in a different order are only searched once. Returns the fewest
+    points reachable and the moves as (card, group, front) tuples.
+    `rules_version` keeps results from other rules apart in the cache.'''
+    # Stopping here is always an option, if the turn can then end
+    if not hand:
+        best = (0, ())
+    elif can_discard(summaries):
+        best = (hand_points(hand), ())
+    else:
+        best = (NO_PLAY, ())
+    if best[0] == 0:
+        return best
+
+    last_card = len(hand) == 1
+    for i in range(len(hand)):
+        card = hand[i]
+        if i > 0 and hand[i - 1] == card:
+            continue
+        rest = hand[:i] + hand[i + 1:]
+        for group in range(len(summaries)):
+            for front in (False, True):
+                new_summary = play_on_group(summaries[group], card, front,
+                                            last_card)
+                if new_summary is None:
+                    continue
+                new_summaries = (summaries[:group] + (new_summary,) +
+                                 summaries[group + 1:])
+                points, moves = _search(rest, new_summaries, rules_version)
+                if points < best[0]:
+                    best = (points, ((card, group, front),) + moves)
+                    if points == 0:
+                        return best
+    return best
+
+
+def _greedy(hand, summaries):
+    '''Plays cards to the table one at a time, highest value first, until no
+    card can be played. Used instead of `_search` for large hands, where it
+    would take too long. Accumulations are only played on when the card
+    completes them, so that the turn can always end with a discard.'''
+    hand = list(hand)
+    summaries = list(summaries)
+    moves = []
+    played = True
+    while played and hand:
+        played = False
+        for card in sorted(set(hand), key=lambda x: -CARD_VALUES[x[0]]):
+            move = _first_play(card, summaries, len(hand) == 1)
+            if move:
+                group, front, new_summary = move
+                summaries[group] = new_summary
+                hand.remove(card)
+                moves.append((card, group, front))
+                played = True
+                break
+    if hand and not can_discard(summaries):
+        return NO_PLAY, ()
+    return hand_points(hand), tuple(moves)
+
+
+def _first_play(card, summaries, last_card):
+    '''Returns the first (group, front, new summary) play of `card` that
+    `_greedy` allows, or None.'''
+    for group in range(len(summaries)):
+        for front in (False, True):
+            new_summary = play_on_group(summaries[group], card, front,
+                                        last_card)
+            if new_summary is None:
+                continue
+            if (new_summary[0] == ACCUMULATION and
+                new_summary[1] not in RULES.accumulation_sequence):
+                continue
+            return group, front, new_summary
+    return None
@@ -0,0 +1,132 @@
+# Contains the GameState type, an immutable snapshot of what a player can see
+# (table, turn history, phase status, hand and discard). Applying a play gives
+# a new state that shares everything the play did not change with the old
+# one, so a search can branch many times without copying the whole game, and
+# without touching the lists the caller passed in.
+
+from .constants import *
+
+
+class History:
+    '''A turn history stored as a linked list of turns, newest first. Each
+    node holds one turn as (player_id, tuple of plays) and a link to the
+    history before it, which is shared, not copied.'''
+    __slots__ = ('turn', 'previous')
+
+    def __init__(self, turn, previous=None):
+        self.turn = turn
+        self.previous = previous
+
+    def add_play(self, player_id, play):
+        '''Returns the history with `play` by `player_id` added, either to
+        the last turn or as a new turn.'''
+        if self.turn[0] == player_id:
+            return History((player_id, self.turn[1] + (play,)),
+                           self.previous)
+        return History((player_id, (play,)), self)
+
+    def to_list(self):
+        '''Returns the history as a list of (player_id, list of plays), the
+        shape used by `phazed_play`.'''
+        turns = []
+        node = self
+        while node is not None:
+            turns.append((node.turn[0], list(node.turn[1])))
+            node = node.previous
+        turns.reverse()
+        return turns
+
+
+class GameState:
+    '''What `player_id` can see of the game. The table is a tuple with a
+    (phase, groups) pair for each player, where groups is a tuple of tuples
+    of cards. States are never changed: `apply` returns a new state.'''
+    __slots__ = ('player_id', 'table', 'history', 'phase_status', 'hand',
+                 'discard')
+
+    def __init__(self, player_id, table, history, phase_status, hand,
+                 discard):
+        self.player_id = player_id
+        self.table = table
+        self.history = history
+        self.phase_status = phase_status
+        self.hand = hand
+        self.discard = discard
+
+    @classmethod
+    def from_args(cls, player_id, table, turn_history, phase_status, hand,
+                  discard):
+        '''Builds a state from the arguments of `phazed_play`. Nothing in
+        the state refers to the lists passed in.'''
+        history = None
+        for turn_player, plays in turn_history:
+            history = History((turn_player, tuple(plays)), history)
+        table = tuple((phase, tuple(tuple(group) for group in groups))
+                      for phase, groups in table)
+        return cls(player_id, table, history, tuple(phase_status),
+                   tuple(hand), discard)
+
+    def to_args(self):
+        '''Returns new lists in the shape of the arguments of `phazed_play`,
+        which the caller is free to change.'''
+        table = [(phase, [list(group) for group in groups])
+                 for phase, groups in self.table]
+        return (self.player_id, table, self.turn_history(),
+                list(self.phase_status), list(self.hand), self.discard)
+
+    def turn_history(self):
+        '''Returns the turn history in the shape used by `phazed_play`.'''
+        return self.history.to_list() if self.history else []
+
+    def apply(self, play, drawn=None):
+        '''Returns the state after this player makes `play`. `drawn` is the
+        card taken from the deck for a play of type 1, if it is known.'''
+        play_type = play[0]
+        history = self._add_to_history(play)
+        hand = self.hand
+        table = self.table
+        discard = self.discard
+        if play_type == PLAY_ONE:
+            if drawn is not None:
+                hand = hand + (drawn,)
+        elif play_type == PLAY_TWO:
+            hand = hand + (play[1],)
+            discard = None
+        elif play_type == PLAY_THREE:
+            phase, groups = play[1]
+            for group in groups:
+                for card in group:
+                    hand = _remove(hand, card)
+            table = _replace(table, self.player_id,
+                             (phase, tuple(tuple(group) for group in groups)))
+        elif play_type == PLAY_FOUR:
+            card, (player, group_num, index) = play[1]
+            hand = _remove(hand, card)
+            phase, groups = table[player]
+            group = groups[group_num]
+            group = group[:index] + (card,) + group[index:]
+            table = _replace(table, player,
+                             (phase, _replace(groups, group_num, group)))
+        elif play_type == PLAY_FIVE:
+            hand = _remove(hand, play[1])
+            discard = play[1]
+        return GameState(self.player_id, table, history, self.phase_status,
+                         hand, discard)
+
+    def _add_to_history(self, play):
+        '''Returns the history with `play` by this player added.'''
+        if self.history is None:
+            return History((self.player_id, (play,)))
+        return self.history.add_play(self.player_id, play)
+
+
+def _replace(items, index, item):
+    '''Returns the tuple `items` with the item at `index` replaced. The other
+    items are shared, not copied.'''
+    return items[:index] + (item,) + items[index + 1:]
+
+
+def _remove(hand, card):
+    '''Returns the tuple `hand` with one copy of `card` taken out.'''
+    index = hand.index(card)
+    return hand[:index] + hand[index + 1:]
@@ -0,0 +1,263 @@
+# Contains the phase solvers used for large hands (many decks, or hands of
+# 20 or more cards), where searching combinations of cards never finishes.
+# Each solver works on the hand grouped by value (and suit or colour), so its
+# running time depends on the number of distinct values rather than on the
+# number of cards.
+
+from collections import defaultdict as dd
+from .constants import *
+from .rules import RULES
+from .memory import probed
+from .phase_distance import group_missing, set_splits
+
+
+@probed
+def large_hand_phase(phase, hand):
+    '''Returns a possible play for `phase` as a list of groups of cards, in the
+    same form as `possible_phase`. Returns False if it is not possible.'''
+    if phase == PHASE_ONE or phase == PHASE_FOUR:
+        return two_value_sets(hand, RULES.set_sizes[phase])
+    if phase == PHASE_TWO:
+        return suit_group(hand, RULES.suit_size)
+    if phase == PHASE_THREE:
+        return two_accumulations(hand, RED + BLACK, RED + BLACK)
+    if phase == PHASE_FIVE:
+        return value_run(hand, RULES.run_size)
+    if phase == PHASE_SIX:
+        for first, second in ((RED, RED), (BLACK, BLACK), (RED, BLACK)):
+            play = two_accumulations(hand, first, second)
+            if play:
+                return play
+        return False
+    if phase == PHASE_SEVEN:
+        return run_and_set(hand, RULES.colour_run_size, RULES.value_set_size)
+    return False
+
+
+def split_hand(hand):
+    '''Returns a dictionary mapping each natural value to its cards, and the
+    list of wild cards.'''
+    by_value = dd(list)
+    wilds = []
+    for card in hand:
+        if card[0] == 'A':
+            wilds.append(card)
+        else:
+            by_value[card[0]].append(card)
+    return by_value, wilds
+
+
+def value_sets(hand, sizes):
+    '''Returns groups of cards of the same value, one for each size in
+    `sizes`, or False. Each group takes the value with the most cards left
+    (the highest value on ties, to get rid of points), and is topped up with
+    wilds.'''
+    by_value, wilds = split_hand(hand)
+    wilds = wilds.copy()
+    groups = []
+    for size in sizes:
+        if not by_value:
+            return False
+        value = max(by_value, key=lambda x: (len(by_value[x]),
+                                             CARD_VALUES[x]))
+        cards = by_value[value]
+        group = cards[:size]
+        if len(group) < MIN_NATURAL or len(wilds) < size - len(group):
+            return False
+        by_value[value] = cards[size:]
+        if not by_value[value]:
+            del by_value[value]
+        for i in range(size - len(group)):
+            group.append(wilds.pop())
+        groups.append(group)
+    return groups
+
+
+def two_value_sets(hand, size):
+    '''Returns two groups of `size` cards of the same value, or False. The
+    groups take the two values with the most cards (the highest values on
+    ties, to get rid of points), or share the cards of the most common value
+    when that is the only way, and are topped up with wilds.'''
+    by_value, wilds = split_hand(hand)
+    values = sorted(by_value, key=lambda x: (len(by_value[x]),
+                                             CARD_VALUES[x]), reverse=True)
+    if not values:
+        return False
+    first = by_value[values[0]]
+    second = by_value[values[1]] if len(values) > 1 else []
+    # each option is the cards of the two groups, before wilds
+    options = [(first[:size], second[:size])]
+    for num, _ in set_splits(len(first)):
+        options.append((first[:num][:size], first[num:][:size]))
+    for one, two in options:
+        if group_missing([(len(one), size), (len(two), size)],
+                         len(wilds)) == 0:
+            used = size - len(one)
+            return [one + wilds[:used],
+                    two + wilds[used:used + size - len(two)]]
+    return False
+
+
+def suit_group(hand, size):
+    '''Returns a group of `size` cards of the same suit, or False.'''
+    by_suit = dd(list)
+    wilds = []
+    for card in hand:
+        if card[0] == 'A':
+            wilds.append(card)
+        else:
+            by_suit[card[1]].append(card)
+    if not by_suit:
+        return False
+    suit = max(by_suit, key=lambda x: len(by_suit[x]))
+    # play the highest value cards of the suit
+    cards = sorted(by_suit[suit], key=lambda x: CARD_VALUES[x[0]],
+                   reverse=True)
+    group = cards[:size]
+    if len(group) < MIN_NATURAL or len(wilds) < size - len(group):
+        return False
+    return [group + wilds[:size - len(group)]]
+
+
+def run_windows(values, size, wilds):
+    '''Takes a set of natural `values`, and returns the first value of each
+    run of `size` cards (cycling through RUN_ORDER) that can be made with
+    `wilds` wild cards, the ones that need the fewest wilds first.'''
+    num_values = len(RUN_ORDER)
+    windows = []
+    for start in range(num_values):
+        present = 0
+        for i in range(size):
+            if RUN_ORDER[(start + i) % num_values] in values:
+                present += 1
+        if present >= MIN_NATURAL and size - present <= wilds:
+            windows.append((-present, start))
+    return [start for _, start in sorted(windows)]
+
+
+def best_window(values, size, wilds):
+    '''Returns the first value of the run in `run_windows` that needs the
+    fewest wilds, or None if no run can be made.'''
+    windows = run_windows(values, size, wilds)
+    return windows[0] if windows else None
+
+
+def build_run(start, size, by_value, wilds):
+    '''Builds the run of `size` cards starting at position `start` in
+    RUN_ORDER, taking cards out of `by_value` and `wilds`.'''
+    group = []
+    for i in range(size):
+        value = RUN_ORDER[(start + i) % len(RUN_ORDER)]
+        if by_value.get(value):
+            group.append(by_value[value].pop())
+        else:
+            group.append(wilds.pop())
+    return group
+
+
+def value_run(hand, size):
+    '''Returns a run of `size` cards, or False.'''
+    if size > RULES.max_run:
+        return False
+    by_value, wilds = split_hand(hand)
+    start = best_window(by_value, size, len(wilds))
+    if start is None:
+        return False
+    return [build_run(start, size, by_value, wilds)]
+
+
+def run_and_set(hand, run_size, set_size):
+    '''Returns a run of `run_size` cards of one colour and a set of
+    `set_size` cards of one value (phase 7), or False. Each run that can be
+    made is tried in turn, the ones needing the fewest wilds first, and the
+    set takes the value with the most cards left over, as the best run may
+    use up cards the set needs.'''
+    by_value, wilds = split_hand(hand)
+    for colour in (RED, BLACK):
+        in_colour = {value: [card for card in cards if card[1] in colour]
+                     for value, cards in by_value.items()}
+        in_colour = {value: cards for value, cards in in_colour.items()
+                     if cards}
+        for start in run_windows(in_colour, run_size, len(wilds)):
+            run_wilds = wilds.copy()
+            run_group = build_run(start, run_size,
+                                  {value: cards.copy() for value, cards
+                                   in in_colour.items()}, run_wilds)
+            rest = [card for card in hand if card[0] != 'A']
+            for card in run_group:
+                if card in rest:
+                    rest.remove(card)
+            sets = value_sets(rest + run_wilds, [set_size])
+            if sets:
+                return [run_group, sets[0]]
+    return False
+
+
+def two_accumulations(hand, first, second):
+    '''Returns two groups of cards that each add up to the accumulation
+    target, or False. The first group can only hold cards whose suit is in
+    `first`, and the second cards whose suit is in `second`, apart from Aces
+    which can go in either.
+
+    This is a subset sum over (sum 1, sum 2) pairs, done one card kind (value
+    and colour) at a time with all its copies at once. Rows of the table are
+    bit masks over sum 2, one row for each sum 1.'''
+    target = RULES.accum_target
+    full = (1 << (target + 1)) - 1
+    kinds = dd(list)
+    for card in hand:
+        wild = card[0] == 'A'
+        into_first = wild or card[1] in first
+        into_second = wild or card[1] in second
+        if into_first or into_second:
+            kinds[(card[0], into_first, into_second)].append(card)
+    kinds = list(kinds.items())
+
+    # layers[i] holds the reachable pairs using the first i kinds
+    reach = [0] * (target + 1)
+    reach[0] = 1
+    layers = [reach]
+    for (value, into_first, into_second), cards in kinds:
+        points = CARD_VALUES[value]
+        new_reach = reach.copy()
+        for a, b in _splits(len(cards), points, into_first, into_second,
+                            target):
+            if a == 0 and b == 0:
+                continue
+            for sum1 in range(target + 1 - a * points):
+                row = reach[sum1]
+                if row:
+                    new_reach[sum1 + a * points] |= (row << b * points) & full
+        reach = new_reach
+        layers.append(reach)
+    if not reach[target] >> target & 1:
+        return False
+
+    # walk back through the layers, taking as many cards as possible
+    first_group = []
+    second_group = []
+    sum1, sum2 = target, target
+    for i in range(len(kinds), 0, -1):
+        (value, into_first, into_second), cards = kinds[i - 1]
+        points = CARD_VALUES[value]
+        prev = layers[i - 1]
+        splits = sorted(_splits(len(cards), points, into_first, into_second,
+                                target), key=lambda x: -(x[0] + x[1]))
+        for a, b in splits:
+            prev1, prev2 = sum1 - a * points, sum2 - b * points
+            if prev1 >= 0 and prev2 >= 0 and prev[prev1] >> prev2 & 1:
+                first_group += cards[:a]
+                second_group += cards[a:a + b]
+                sum1, sum2 = prev1, prev2
+                break
+    return [first_group, second_group]
+
+
+def _splits(count, points, into_first, into_second, target):
+    '''Returns the (number in the first group, number in the second group)
+    pairs for `count` copies of a card worth `points`.'''
+    most = target // points
+    max_first = min(count, most) if into_first else 0
+    max_second = min(count, most) if into_second else 0
+    return [(a, b) for a in range(max_first + 1)
+            for b in range(min(max_second, count - a) + 1)]
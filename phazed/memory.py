@@ -0,0 +1,117 @@
+# Contains the opt-in memory probe. Functions marked with `probed` record,
+# while the probe is on, how many times they were called, the peak memory
+# each call allocated above what was in use when it started, and the memory
+# left allocated when it returned. Calls can nest (a solver inside
+# phazed_play), and each level gets its own peak. The probe uses tracemalloc,
+# which slows everything down a lot, so it is off unless `enable_probe` is
+# called, and then the marked functions only pay for a flag check. Each
+# probed call resets the tracemalloc peak, so while the probe is on, the peak
+# that tracemalloc reports is no longer the one of the whole program.
+
+from functools import wraps
+
+_enabled = False
+_started = False  # whether enable_probe started tracemalloc
+_stats = {}
+_stack = []  # [start, peak] for each probed call in progress
+
+
+class ProbeStats:
+    '''The allocations recorded for one probed function. Sizes are in
+    bytes.'''
+    def __init__(self):
+        self.calls = 0
+        self.max_peak = 0  # the largest peak of a single call
+        self.total_peak = 0  # the peaks of all the calls added up
+        self.retained = 0  # memory still allocated when the calls returned
+
+    def record(self, peak, retained):
+        self.calls += 1
+        self.max_peak = max(self.max_peak, peak)
+        self.total_peak += peak
+        self.retained += retained
+
+    def mean_peak(self):
+        return self.total_peak / self.calls if self.calls else 0
+
+
+def enable_probe():
+    '''Starts recording the allocations of the probed functions. If tracing
+    was already running, it is used as it is, but every probed call resets
+    the peak: code that reads `tracemalloc.get_traced_memory()` for its own
+    peak should read it before enabling the probe.'''
+    global _enabled, _started
+    import tracemalloc
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _started = True
+    _enabled = True
+
+
+def disable_probe():
+    '''Stops recording. The stats recorded so far are kept. Tracing is only
+    stopped if `enable_probe` started it.'''
+    global _enabled, _started
+    import tracemalloc
+    _enabled = False
+    _stack.clear()
+    if _started:
+        tracemalloc.stop()
+        _started = False
+
+
+def reset_probe():
+    '''Forgets the stats recorded so far.'''
+    _stats.clear()
+
+
+def probe_stats():
+    '''Returns a dictionary mapping the name of each probed function that has
+    been called to its ProbeStats.'''
+    return dict(_stats)
+
+
+def probe_report():
+    '''Returns the recorded stats as a table, in KB, largest peak first.'''
+    lines = ['{:<28} {:>7} {:>10} {:>10} {:>10}'.format(
+        'function', 'calls', 'max peak', 'mean peak', 'retained')]
+    for name, stats in sorted(_stats.items(), key=lambda x: -x[1].max_peak):
+        lines.append('{:<28} {:>7} {:>10.1f} {:>10.1f} {:>10.1f}'.format(
+            name, stats.calls, stats.max_peak / 1024,
+            stats.mean_peak() / 1024, stats.retained / 1024))
+    return '\n'.join(lines)
+
+
+def probed(function):
+    '''Marks `function` to have its allocations recorded by the probe.'''
+    name = function.__name__
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return function(*args, **kwargs)
+        import tracemalloc
+        current, peak = tracemalloc.get_traced_memory()
+        # the peak so far belongs to the call this one is nested in
+        if _stack:
+            _stack[-1][1] = max(_stack[-1][1], peak)
+        tracemalloc.reset_peak()
+        frame = [current, current]
+        _stack.append(frame)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            end, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, frame[1])
+            _stack.pop()
+            if _stack:
+                _stack[-1][1] = max(_stack[-1][1], peak)
+            if name not in _stats:
+                _stats[name] = ProbeStats()
+            _stats[name].record(peak - frame[0], end - frame[0])
+    # keep the cache controls of a function wrapped in lru_cache
+    for attr in ('cache_info', 'cache_clear', 'cache_parameters'):
+        if hasattr(function, attr):
+            setattr(wrapper, attr, getattr(function, attr))
+    wrapper.probed = True
+    return wrapper
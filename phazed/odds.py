@@ -0,0 +1,388 @@
+# Contains the tables of the odds of completing each phase within k draws
+# (k = 1 to MAX_DRAWS), and the functions to build, save and look them up.
+#
+# The odds are worked out offline by dynamic programming over a compact
+# summary of the hand for each phase:
+#   phases 1 and 4: wilds, the counts of the two most common values, and how
+#            many values are tied for second
+#   phase 2: wilds, and the most natural cards held in one suit
+#   phase 5: wilds, and the most values held in one run window
+#   phase 7: wilds, the most values of one colour in a run window, and the
+#            count of the most common value
+#   phases 3 and 6: the points still missing from the cards that can go
+#            into the accumulations (for phase 6, per colour, and whether
+#            both accumulations take the same colour)
+# Every draw is taken to be from a full shoe (each value 1 in 13, each suit
+# 1 in 4), and the cards that don't help are assumed to be the ones
+# discarded. Where a drawn card could help more than one group, the DP picks
+# the better. Each summary is stored in a mixed radix array, so a lookup is
+# one index calculation once the hand is summarised, and summarising takes
+# one pass over the hand plus a few bit mask operations.
+#
+# The summaries follow one best group (window, suit or value), so the odds
+# are an estimate, on the low side for hands that have several nearly equal
+# ways to the phase. For accumulations it is on the high side instead, as
+# the cards are taken to split into the exact targets once the points are
+# there, which they nearly always do.
+
+import os
+import struct
+import sys
+from array import array
+from .constants import *
+from .rules import RULES
+from .phase_distance import (HandSummary, group_missing, most_in_run,
+                             run_windows, sets_missing)
+
+MAX_DRAWS = 5
+ODDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         'odds.bin')
+MAGIC = b'PHZO'
+FORMAT_VERSION = 1
+SCALE = 0xFFFF  # odds are stored as 16 bit fractions of this
+MAX_DIMS = 4
+# magic, format version, number of draws, rules fingerprint, number of phases
+HEADER = struct.Struct('<4sHHIH')
+# phase, number of dimensions, size of each dimension, first entry
+ENTRY = struct.Struct('<BB{}BI'.format(MAX_DIMS))
+P_CARD = 1 / len(CARD_VALUES)  # chance of drawing a given value (or an Ace)
+P_NATURAL = 1 - P_CARD  # chance of drawing a natural card
+
+_tables = None  # phase -> (dimension sizes, first entry), once loaded
+_odds = None  # the odds of every table, MAX_DRAWS entries per state
+_loaded_version = None  # RULES.version when the tables were loaded
+
+
+def completion_odds(hand, phase, draws):
+    '''Returns the odds of completing `phase` from `hand` within `draws` more
+    draws (1 to MAX_DRAWS), or None if there is no table for the rules in
+    use. The tables are read from ODDS_PATH on first use, and again if the
+    rules change.'''
+    if _loaded_version != RULES.version:
+        load_odds()
+    if _tables is None:
+        return None
+    summary = HandSummary(hand)
+    return max(_lookup(phase, state, draws)
+               for state in hand_states(summary, phase))
+
+
+def load_odds(path=ODDS_PATH):
+    '''Reads the tables from `path`. Returns False, and leaves no tables
+    loaded, if the file is missing or was built for other rules.'''
+    global _tables, _odds, _loaded_version
+    _tables = _odds = None
+    _loaded_version = RULES.version
+    if not os.path.exists(path):
+        return False
+    with open(path, 'rb') as file:
+        header = file.read(HEADER.size)
+        magic, version, draws, fingerprint, num_phases = \
+            HEADER.unpack(header)
+        if (magic != MAGIC or version != FORMAT_VERSION or
+                draws != MAX_DRAWS or fingerprint != RULES.fingerprint()):
+            return False
+        tables = {}
+        for _ in range(num_phases):
+            phase, num_dims, *sizes, first = ENTRY.unpack(
+                file.read(ENTRY.size))
+            tables[phase] = (sizes[:num_dims], first)
+        # the odds are read straight into the array, without a copy
+        size = os.path.getsize(path) - file.tell()
+        _odds = array('H', [0]) * (size // 2)
+        file.readinto(_odds)
+    if sys.byteorder == 'big':
+        _odds.byteswap()  # the file is little endian
+    _tables = tables
+    return True
+
+
+def _lookup(phase, state, draws):
+    '''Returns the stored odds of `state` for `phase`. Parts of the state
+    past the end of the table are clamped, as more of them can't help.'''
+    sizes, first = _tables[phase]
+    index = 0
+    for part, size in zip(state, sizes):
+        index = index * size + min(part, size - 1)
+    return _odds[(first + index) * MAX_DRAWS + draws - 1] / SCALE
+
+
+def hand_states(summary, phase):
+    '''Returns the summaries of the hand in the HandSummary `summary` for the
+    table of `phase`. There is one for most phases, three for phase 7, and one
+    for each way of taking colours into the accumulations for phase 6.'''
+    wilds = summary.wilds
+    if phase in (PHASE_ONE, PHASE_FOUR):
+        counts = sorted(summary.values.values(), reverse=True) + [0, 0]
+        tied = counts[1:].count(counts[1]) if counts[1] else 0
+        return [(wilds, counts[0], counts[1], tied)]
+    if phase == PHASE_TWO:
+        return [(wilds, max(sum(summary.suits[suit].values())
+                            for suit in SUITS))]
+    if phase == PHASE_FIVE:
+        return [(wilds, most_in_run(summary.value_mask(), RULES.run_size))]
+    if phase == PHASE_SEVEN:
+        return _phase_seven_states(summary)
+    target = RULES.accum_target
+    points = {colour: sum(CARD_VALUES[value] * count
+                          for value, count in counts.items() if value != 'A')
+              for colour, counts in summary.colour_values.items()}
+    wild_points = wilds * CARD_VALUES['A']
+    if phase == PHASE_THREE:
+        return [(max(0, 2 * target - sum(points.values()) - wild_points),)]
+    if phase == PHASE_SIX:
+        states = [(1, max(0, 2 * target - points[colour] - wild_points), 0)
+                  for colour in (RED, BLACK)]
+        # the wilds go to the red accumulation first, then the black
+        red = max(0, target - points[RED])
+        black = max(0, target - points[BLACK] - max(0, wild_points - red))
+        states.append((0, max(0, red - wild_points), black))
+        return states
+    return []
+
+
+def _phase_seven_states(summary):
+    '''Returns the states of the phase 7 table. As in the distance, a card
+    of the set's value goes either to the set or to the run, but leaving a
+    value out of the run only costs it a card if the value is in every best
+    window. So there are three states: the best set among the values the run
+    can do without, the best set among the others with one card less in the
+    run, and that same set with one card less, which the run keeps.'''
+    size = RULES.colour_run_size
+    run = 0
+    needed = 0  # values in every best window, of both colours
+    for colour in (RED, BLACK):
+        mask = summary.colour_mask(colour)
+        for window in run_windows(size):
+            held = bin(mask & window).count('1')
+            if held > run:
+                run, needed = held, mask & window
+            elif held == run:
+                needed &= mask & window
+    free = needed_set = 0
+    for value, count in summary.values.items():
+        if (needed >> RUN_ORDER.index(value) & 1 and
+                count <= RULES.value_set_size):
+            needed_set = max(needed_set, count)
+        else:
+            free = max(free, count)
+    return [(summary.wilds, run, free),
+            (summary.wilds, max(0, run - 1), needed_set),
+            (summary.wilds, run, max(0, needed_set - 1))]
+
+
+def build_odds():
+    '''Works out the tables for the rules in use. Returns a dictionary
+    mapping each phase to (dimension sizes, odds), where the odds are a list
+    with MAX_DRAWS entries per state, states in mixed radix order.'''
+    return {phase: _solve(*_model(phase))
+            for phase in range(PHASE_ONE, PHASE_SEVEN + 1)}
+
+
+def save_odds(tables, path=ODDS_PATH):
+    '''Writes the tables from `build_odds` to `path`.'''
+    data = array('H')
+    entries = []
+    for phase, (sizes, odds) in sorted(tables.items()):
+        padded = list(sizes) + [1] * (MAX_DIMS - len(sizes))
+        entries.append(ENTRY.pack(phase, len(sizes), *padded,
+                                  len(data) // MAX_DRAWS))
+        data.extend(round(chance * SCALE) for chance in odds)
+    if sys.byteorder == 'big':
+        data.byteswap()
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, FORMAT_VERSION, MAX_DRAWS,
+                               RULES.fingerprint(), len(tables)))
+        file.write(b''.join(entries))
+        file.write(data.tobytes())
+
+
+def _solve(sizes, complete, moves):
+    '''Works out the odds of completion within 1 to MAX_DRAWS draws for every
+    state of the given dimension sizes. `complete(state)` says whether the
+    phase can be played, and `moves(state)` lists (chance, options) for each
+    kind of card that can be drawn, where options are the states the player
+    can choose to keep.'''
+    states = [()]
+    for size in sizes:
+        states = [state + (part,) for state in states for part in range(size)]
+    index = {state: i for i, state in enumerate(states)}
+    done = [1.0 if complete(state) else 0.0 for state in states]
+    odds = [[] for _ in states]
+    previous = done
+    for _ in range(MAX_DRAWS):
+        current = []
+        for i, state in enumerate(states):
+            if done[i]:
+                current.append(1.0)
+                continue
+            chance = 0.0
+            for move_chance, options in moves(state):
+                chance += move_chance * max(previous[index[_clamp(option,
+                                                                  sizes)]]
+                                            for option in options)
+            current.append(chance)
+        for i, chance in enumerate(current):
+            odds[i].append(chance)
+        previous = current
+    return sizes, [chance for state_odds in odds for chance in state_odds]
+
+
+def _clamp(state, sizes):
+    return tuple(max(0, min(part, size - 1))
+                 for part, size in zip(state, sizes))
+
+
+def _model(phase):
+    '''Returns the (dimension sizes, complete, moves) of the summary DP for
+    `phase`.'''
+    if phase in (PHASE_ONE, PHASE_FOUR):
+        return _sets_model(RULES.set_sizes[phase])
+    if phase == PHASE_TWO:
+        return _suit_model(RULES.suit_size)
+    if phase == PHASE_FIVE:
+        return _run_model(RULES.run_size)
+    if phase == PHASE_SEVEN:
+        return _phase_seven_model(RULES.colour_run_size,
+                                  RULES.value_set_size)
+    return _accum_model(phase)
+
+
+def _sets_model(size):
+    '''Two sets of `size`: (wilds, most common count, second count, number
+    of other values held with the second count). Two sets can come from one
+    value, so the first count goes up to 2 * size.'''
+    num_values = len(CARD_VALUES) - 1
+
+    def complete(state):
+        wilds, first, second, _ = state
+        return sets_missing(first, second, size, wilds) == 0
+
+    def moves(state):
+        wilds, first, second, tied = state
+        result = [(P_CARD, [(wilds + 1, first, second, tied)])]
+        if not first:
+            return result + [(P_NATURAL, [(wilds, 1, 0, 0)])]
+        result.append((P_CARD, [(wilds, first + 1, second, tied)]))
+        if not second:
+            return result + [(P_NATURAL - P_CARD, [(wilds, first, 1, 1)])]
+        if second + 1 > first:
+            raised = (wilds, second + 1, first, 1)
+        else:
+            raised = (wilds, first, second + 1, 1)
+        result.append((tied * P_CARD, [raised]))
+        unheld = 0
+        if second == 1:
+            # a value not held yet ties with the second
+            unheld = num_values - 1 - tied
+            result.append((unheld * P_CARD, [(wilds, first, 1, tied + 1)]))
+        return result + [((num_values - 1 - tied - unheld) * P_CARD,
+                          [state])]
+
+    return ([2 * size + 1, 2 * size + 1, size + 1, num_values], complete,
+            moves)
+
+
+def _suit_model(size):
+    '''Cards of one suit (phase 2): (wilds, natural cards held in the best
+    suit). Any natural can start the group, and then only its suit helps.'''
+    def complete(state):
+        return group_missing([(state[1], size)], state[0]) == 0
+
+    def moves(state):
+        wilds, held = state
+        helps = P_NATURAL if not held else P_NATURAL / len(SUITS)
+        return [(P_CARD, [(wilds + 1, held)]),
+                (helps, [(wilds, held + 1)]),
+                (P_NATURAL - helps, [state])]
+
+    return [size + 1, size + 1], complete, moves
+
+
+def _run_model(size):
+    '''A run of `size` (phase 5): (wilds, values held in the best window).
+    A natural helps if its value is one of those the window still needs.'''
+    def complete(state):
+        return group_missing([(state[1], size)], state[0]) == 0
+
+    def moves(state):
+        wilds, held = state
+        helps = (P_NATURAL if not held else
+                 P_CARD * max(0, size - held))
+        return [(P_CARD, [(wilds + 1, held)]),
+                (helps, [(wilds, held + 1)]),
+                (P_NATURAL - helps, [state])]
+
+    return [size + 1, size + 1], complete, moves
+
+
+def _phase_seven_model(run_size, set_size):
+    '''A colour run plus a set (phase 7): (wilds, values held in the best
+    colour window, count of the most common value).'''
+    def complete(state):
+        wilds, run, same = state
+        return group_missing([(same, set_size), (run, run_size)], wilds) == 0
+
+    def moves(state):
+        wilds, run, same = state
+        result = [(P_CARD, [(wilds + 1, run, same)])]
+        extends = (P_NATURAL if not run else
+                   P_CARD * max(0, run_size - run) / 2)
+        if not same:
+            # any natural can start the set
+            return result + [
+                (extends, [(wilds, run + 1, same), (wilds, run, 1)]),
+                (P_NATURAL - extends, [(wilds, run, 1)])]
+        matches = P_CARD
+        if not run:
+            # any natural can start the run, the set's value as well
+            return result + [
+                (matches, [(wilds, run + 1, same), (wilds, run, same + 1)]),
+                (P_NATURAL - matches, [(wilds, run + 1, same)])]
+        return result + [(matches, [(wilds, run, same + 1)]),
+                         (extends, [(wilds, run + 1, same)]),
+                         (P_NATURAL - matches - extends, [state])]
+
+    return ([run_size + set_size + 1, run_size + 1, set_size + 1], complete,
+            moves)
+
+
+def _accum_model(phase):
+    '''Two accumulations (phases 3 and 6): the points still missing. For
+    phase 3 that is one amount, (missing,), as any card can go into either
+    accumulation. For phase 6 the state is (1, missing, 0) if both take the
+    same colour, and (0, missing red, missing black) if they take one colour
+    each. Aces count 1 and go into either accumulation.'''
+    target = RULES.accum_target
+    wild = CARD_VALUES['A']
+
+    if phase == PHASE_THREE:
+        def moves(state):
+            return [(P_CARD, [(max(0, state[0] - points),)])
+                    for points in CARD_VALUES.values()]
+
+        return [2 * target + 1], lambda state: not state[0], moves
+
+    def complete(state):
+        return not state[1] and not state[2]
+
+    def moves(state):
+        same, red, black = state
+        if same:
+            result = [(P_CARD, [(1, max(0, red - wild), 0)])]
+        else:
+            result = [(P_CARD, [(0, max(0, red - wild), black),
+                                (0, red, max(0, black - wild))])]
+        for value, points in CARD_VALUES.items():
+            if value == 'A':
+                continue
+            # half the cards of each value are red, half black
+            if same:
+                result += [(P_CARD / 2, [(1, max(0, red - points), 0)]),
+                           (P_CARD / 2, [state])]
+            else:
+                result += [(P_CARD / 2, [(0, max(0, red - points), black)]),
+                           (P_CARD / 2, [(0, red, max(0, black - points))])]
+        return result
+
+    return [2, 2 * target + 1, target + 1], complete, moves
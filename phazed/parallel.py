@@ -0,0 +1,102 @@
+# Contains the worker pool used to score candidate plays in parallel within a
+# single decision. The pool is started once and reused. Each task is sent
+# the game state packed into a short string plus a contiguous chunk of the
+# candidates, and the results are put back in candidate order, so the answer
+# does not depend on the number of workers. Small batches are scored serially,
+# as the cost of sending them to the pool would outweigh the gain.
+
+import atexit
+from .rules import RULES
+from .shared_cache import shared_cache, attach_shared_cache
+
+MIN_BATCH = 16  # batches with fewer candidates than this are scored serially
+
+_pool = None
+_num_workers = 0
+_min_batch = MIN_BATCH
+
+
+def configure_pool(num_workers, min_batch=MIN_BATCH):
+    '''Sets the number of worker processes used to score candidates (0 or 1
+    to always score serially), and the smallest batch worth sending to them.
+    A running pool of a different size is shut down.'''
+    global _num_workers, _min_batch
+    if num_workers != _num_workers:
+        shutdown_pool()
+    _num_workers = num_workers
+    _min_batch = min_batch
+
+
+def shutdown_pool():
+    '''Stops the worker processes, if they are running.'''
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
+
+
+atexit.register(shutdown_pool)
+
+
+def _get_pool():
+    '''Returns the worker pool, starting it on first use. The import is left
+    until then, as it pulls in multiprocessing, which most of the callers
+    that only ever score serially never need.'''
+    global _pool
+    if _pool is None:
+        from concurrent.futures import ProcessPoolExecutor
+        shared = shared_cache()
+        _pool = ProcessPoolExecutor(
+            max_workers=_num_workers, initializer=_start_worker,
+            initargs=(shared.handle() if shared else None,))
+    return _pool
+
+
+def _start_worker(shared_handle):
+    '''Sets up a worker as it starts: it uses the same shared cache as the
+    process that started the pool, if there is one.'''
+    if shared_handle is not None:
+        attach_shared_cache(shared_handle)
+
+
+def pack_hand(hand):
+    '''Packs a list of cards into a single string. Every card is 2
+    characters long.'''
+    return ''.join(hand)
+
+
+def unpack_hand(packed):
+    '''Turns a string from `pack_hand` back into a list of cards.'''
+    return [packed[i:i + 2] for i in range(0, len(packed), 2)]
+
+
+def score_candidates(task, state, candidates):
+    '''Returns the list of scores for `candidates`, in the same order, where
+    `task(state, chunk)` returns the scores for a chunk of candidates. `task`
+    has to be a module level function, and `state` should be small, as both
+    are sent to the workers.'''
+    if _num_workers <= 1 or len(candidates) < _min_batch:
+        return task(state, candidates)
+
+    # one contiguous chunk per worker keeps the results in order
+    size = -(-len(candidates) // _num_workers)
+    # the version counts changes in this process, so it isn't sent
+    rules = {name: value for name, value in vars(RULES).items()
+             if name != 'version'}
+    fingerprint = RULES.fingerprint()
+    futures = [_get_pool().submit(_run_task, rules, fingerprint, task, state,
+                                  candidates[i:i + size])
+               for i in range(0, len(candidates), size)]
+    scores = []
+    for future in futures:
+        scores += future.result()
+    return scores
+
+
+def _run_task(rules, fingerprint, task, state, chunk):
+    '''Runs `task` in a worker, under the same rules as the caller. The rules
+    are only changed if they differ, so the worker's caches keyed on the rules
+    version stay valid from one task to the next.'''
+    if RULES.fingerprint() != fingerprint:
+        RULES.update(**rules)
+    return task(state, chunk)
@@ -0,0 +1,319 @@
+# Contains functions that measure how far a hand is from completing a phase.
+# The measure is the minimum number of extra cards that would need to be drawn
+# to complete the phase, and is worked out from value/suit histograms and
+# bit masks rather than by searching for the phase itself.
+
+from collections import defaultdict as dd
+from functools import lru_cache
+from .constants import *
+from .rules import RULES
+from .parallel import pack_hand, unpack_hand, score_candidates
+from .memory import probed
+
+
+def phase_distance(hand, phase):
+    '''Returns the minimum number of cards missing from `hand` to complete
+    `phase`. Returns 0 if the phase can already be played.'''
+    return _distance(HandSummary(hand), phase)
+
+
+def discard_distances(hand, phase):
+    '''Returns a dictionary mapping each card in `hand` to the value of
+    `phase_distance` for the hand once that card has been discarded. The hand
+    is summarised once, and each candidate is evaluated by taking the card out
+    of the summary and putting it back. Large batches of candidates are
+    spread over the worker pool in parallel.py.'''
+    cards = list(dict.fromkeys(hand))
+    scores = score_candidates(_discard_task, (pack_hand(hand), phase), cards)
+    return dict(zip(cards, scores))
+
+
+@probed
+def pickup_distances(hand, phase, cards):
+    '''Returns a dictionary mapping each card in `cards` to the value of
+    `phase_distance` for `hand` once that card has been picked up. Cards that
+    only differ in ways `phase` ignores share one evaluation.'''
+    by_key = {}
+    for card in cards:
+        by_key.setdefault(card_key(card, phase), card)
+    scores = score_candidates(_pickup_task, (pack_hand(hand), phase),
+                              list(by_key.values()))
+    scores = dict(zip(by_key, scores))
+    return {card: scores[card_key(card, phase)] for card in cards}
+
+
+def _discard_task(state, cards):
+    '''Returns the distance to the phase once each of `cards` is discarded
+    from the packed hand in `state`.'''
+    packed, phase = state
+    summary = HandSummary(unpack_hand(packed))
+    distances = []
+    for card in cards:
+        summary.remove(card)
+        distances.append(_distance(summary, phase))
+        summary.add(card)
+    return distances
+
+
+def _pickup_task(state, cards):
+    '''Returns the distance to the phase once each of `cards` is added to the
+    packed hand in `state`.'''
+    packed, phase = state
+    summary = HandSummary(unpack_hand(packed))
+    distances = []
+    for card in cards:
+        summary.add(card)
+        distances.append(_distance(summary, phase))
+        summary.remove(card)
+    return distances
+
+
+@probed
+def best_discard(hand, phase, avoid=(), draws=0):
+    '''Returns the card in `hand` whose discard hurts the distance to `phase`
+    the least. With `draws`, ties go to the discard that leaves the best odds
+    of completing the phase within that many draws (see odds.py). Then ties
+    keep Aces where possible, then keep cards whose value is in `avoid` (such
+    as values the other players are collecting), and then discard the highest
+    value card.'''
+    distances = discard_distances(hand, phase)
+    odds = {}
+    if draws:
+        # imported here, as odds.py is built on this module
+        from .odds import completion_odds
+        closest = min(distances.values())
+        tied = [card for card, distance in distances.items()
+                if distance == closest]
+        for card in tied if len(tied) > 1 else ():
+            rest = list(hand)
+            rest.remove(card)
+            odds[card] = completion_odds(rest, phase, draws) or 0
+    return min(hand, key=lambda x: (distances[x], -odds.get(x, 0),
+                                    x[0] == 'A', x[0] in avoid,
+                                    -CARD_VALUES[x[0]]))
+
+
+def card_key(card, phase):
+    '''Returns the part of `card` that matters to the distance to `phase`:
+    the value for phases 1, 3, 4 and 5, the value and colour for phases 6
+    and 7, and the whole card otherwise.'''
+    if phase in (PHASE_ONE, PHASE_THREE, PHASE_FOUR, PHASE_FIVE):
+        return card[0]
+    if phase in (PHASE_SIX, PHASE_SEVEN):
+        return card[0], card[1] in RED
+    return card
+
+
+class HandSummary:
+    '''Histograms of a hand: the number of wilds, the count of each natural
+    value, the count of each natural value per suit, and the count of each
+    card value (Aces included) per colour for accumulations.'''
+    def __init__(self, hand=()):
+        self.wilds = 0
+        self.values = dd(int)
+        self.suits = {suit: dd(int) for suit in SUITS}
+        self.colour_values = {RED: dd(int), BLACK: dd(int)}
+        for card in hand:
+            self.add(card)
+
+    def add(self, card, num=1):
+        '''Adds `num` copies of `card` to the summary.'''
+        value, suit = card[0], card[1]
+        colour = RED if suit in RED else BLACK
+        self.colour_values[colour][value] += num
+        if value == 'A':
+            self.wilds += num
+        else:
+            self.values[value] += num
+            self.suits[suit][value] += num
+
+    def remove(self, card):
+        '''Takes one copy of `card` out of the summary.'''
+        self.add(card, -1)
+
+    def colour_mask(self, colour):
+        '''Returns a bit mask of the natural values held in `colour`, where
+        bit i is set if the value RUN_ORDER[i] is held.'''
+        mask = 0
+        for suit in colour:
+            for value, count in self.suits[suit].items():
+                if count > 0:
+                    mask |= 1 << RUN_ORDER.index(value)
+        return mask
+
+    def value_mask(self):
+        '''Returns a bit mask of all natural values held, as in
+        `colour_mask`.'''
+        return self.colour_mask(RED) | self.colour_mask(BLACK)
+
+
+def group_missing(groups, wilds):
+    '''Takes a (number of natural cards held, group length) pair for each group
+    of a phase, and returns the number of cards missing once `wilds` wild cards
+    have been used to fill the gaps. Each group needs at least MIN_NATURAL
+    natural cards, which wilds can't replace.'''
+    missing = 0
+    wild_slots = 0
+    for num, size in groups:
+        num = min(num, size)
+        missing += max(0, MIN_NATURAL - num)
+        wild_slots += size - max(num, MIN_NATURAL)
+    return missing + max(0, wild_slots - wilds)
+
+
+def _distance(summary, phase):
+    '''Works out `phase_distance` from a HandSummary.'''
+    if phase == PHASE_ONE:
+        return _sets_distance(summary, RULES.set_sizes[PHASE_ONE])
+    if phase == PHASE_TWO:
+        return min(group_missing([(sum(summary.suits[suit].values()),
+                                   RULES.suit_size)], summary.wilds)
+                   for suit in SUITS)
+    if phase == PHASE_THREE:
+        return _accum_distance(summary, RED + BLACK, RED + BLACK)
+    if phase == PHASE_FOUR:
+        return _sets_distance(summary, RULES.set_sizes[PHASE_FOUR])
+    if phase == PHASE_FIVE:
+        return _run_distance(summary, RULES.run_size)
+    if phase == PHASE_SIX:
+        return min(_accum_distance(summary, RED, RED),
+                   _accum_distance(summary, BLACK, BLACK),
+                   _accum_distance(summary, RED, BLACK))
+    if phase == PHASE_SEVEN:
+        return _phase_seven_distance(summary)
+    return 0
+
+
+def _sets_distance(summary, size):
+    '''Distance to two sets of `size` cards of the same value.'''
+    counts = sorted(summary.values.values(), reverse=True) + [0, 0]
+    return sets_missing(counts[0], counts[1], size, summary.wilds)
+
+
+def sets_missing(first, second, size, wilds):
+    '''Returns the cards missing from two sets of `size`, given the counts of
+    the two most common values and the number of wilds. The two sets can
+    either take the two most common values, or both share the most common,
+    split between them in any way.'''
+    options = [(first, second)] + set_splits(first)
+    return min(group_missing([(num, size) for num in option], wilds)
+               for option in options)
+
+
+def set_splits(count):
+    '''Returns the ways `count` cards of one value can be split between two
+    sets, as (number in the first set, number in the second) pairs with at
+    least MIN_NATURAL in each.'''
+    return [(count - num, num)
+            for num in range(MIN_NATURAL, count - MIN_NATURAL + 1)]
+
+
+@lru_cache(maxsize=None)
+def run_windows(length):
+    '''Returns the bit masks of every cyclic window of `length` consecutive
+    values in RUN_ORDER.'''
+    num_values = len(RUN_ORDER)
+    windows = []
+    for start in range(num_values):
+        window = 0
+        for i in range(length):
+            window |= 1 << ((start + i) % num_values)
+        windows.append(window)
+    return tuple(windows)
+
+
+def most_in_run(mask, length):
+    '''Returns the largest number of natural values from the bit `mask` that
+    fit in one run of `length` cards.'''
+    return max(bin(mask & window).count('1') for window in run_windows(length))
+
+
+def _run_distance(summary, length):
+    '''Distance to a run of `length` cards of any suit.'''
+    present = most_in_run(summary.value_mask(), length)
+    return group_missing([(present, length)], summary.wilds)
+
+
+def _phase_seven_distance(summary):
+    '''Distance to a run of cards of one colour plus a set of cards of one
+    value. A card of the set's value either goes to the set, or to the run,
+    leaving the set one natural card fewer.'''
+    run_size = RULES.colour_run_size
+    set_size = RULES.value_set_size
+    best = None
+    for value in RUN_ORDER:
+        count = summary.values[value]
+        bit = 1 << RUN_ORDER.index(value)
+        for colour in (RED, BLACK):
+            mask = summary.colour_mask(colour)
+            options = [(count, mask & ~bit)]
+            if mask & bit:
+                options.append((count - 1, mask))
+            for in_set, run_mask in options:
+                missing = group_missing(
+                    [(in_set, set_size),
+                     (most_in_run(run_mask, run_size), run_size)],
+                    summary.wilds)
+                if best is None or missing < best:
+                    best = missing
+    return best
+
+
+def _accum_distance(summary, first, second):
+    '''Distance to two accumulations of the target, where the first may only use
+    cards whose suit is in `first` and the second cards whose suit is in
+    `second`. Aces count as 1, and may go into either accumulation.
+
+    The reachable (sum 1, sum 2) pairs are kept as a list indexed by sum 1 of
+    bit masks over sum 2, so that adding a card is a shift per row.'''
+    target = RULES.accum_target
+    reach = accum_reach(summary, first, second)
+
+    # Each missing gap of d can be filled by ceil(d / MAX_CARD) cards
+    best = None
+    for sum1 in range(target + 1):
+        row = reach[sum1]
+        if not row:
+            continue
+        gap1 = -(-(target - sum1) // MAX_CARD)
+        # the highest reachable sum 2 is the best for this row
+        gap2 = -(-(target - (row.bit_length() - 1)) // MAX_CARD)
+        if best is None or gap1 + gap2 < best:
+            best = gap1 + gap2
+    return best
+
+
+def accum_reach(summary, first, second):
+    '''Returns the (sum 1, sum 2) pairs that disjoint parts of the hand in
+    `summary` can make towards two accumulations, limited as in
+    `_accum_distance`, as a list indexed by sum 1 of bit masks over sum 2.'''
+    target = RULES.accum_target
+    full = (1 << (target + 1)) - 1
+    reach = [0] * (target + 1)
+    reach[0] = 1
+    for colour, counts in summary.colour_values.items():
+        for value, count in counts.items():
+            wild = value == 'A'
+            into_first = wild or colour in first
+            into_second = wild or colour in second
+            # no more than target // value copies fit in each accumulation
+            count = min(count, 2 * (target // CARD_VALUES[value]))
+            for _ in range(count):
+                reach = _add_to_reach(reach, CARD_VALUES[value], into_first,
+                                      into_second, full)
+    return reach
+
+
+def _add_to_reach(reach, value, into_first, into_second, full):
+    '''Returns the reachable pairs once a card of `value` is available to the
+    first and/or second accumulation (or left out).'''
+    new_reach = reach.copy()
+    for sum1 in range(len(reach)):
+        row = reach[sum1]
+        if not row:
+            continue
+        if into_second:
+            new_reach[sum1] |= (row << value) & full
+        if into_first and sum1 + value < len(reach):
+            new_reach[sum1 + value] |= row
+    return new_reach
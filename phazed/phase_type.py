@@ -1,5 +1,8 @@
 # Contains functions that deal with the type of play (phase) allowed
 
+from .constants import *
+from .rules import RULES
+
 def phazed_phase_type(phase):
     '''Takes a 'phase' and returns a sorted list of corresponding phase numbers 
     Returns an empty list if there are no valid phase combinations.'''
@@ -9,8 +12,11 @@ def phazed_phase_type(phase):
     # Check if the phase is 1
     if num_groups == 2:
         # check that both sets of cards include 3 cards, and at least 2 natural
-        if (len(phase[0]) == 3 and num_natural(phase[0]) >= MIN_NATURAL and 
-            len(phase[1]) == 3 and num_natural(phase[1]) >= MIN_NATURAL):
+        set_size = RULES.set_sizes[PHASE_ONE]
+        if (len(phase[0]) == set_size and 
+            num_natural(phase[0]) >= MIN_NATURAL and 
+            len(phase[1]) == set_size and 
+            num_natural(phase[1]) >= MIN_NATURAL):
             if same_value(phase[0]) and same_value(phase[1]):
                 phase_list.append(PHASE_ONE)   
             
@@ -18,7 +24,7 @@ def phazed_phase_type(phase):
     if num_groups == 1:
         num_cards = len(phase[0])
         group = phase[0]
-        if num_cards == 7 and num_natural(group) >= MIN_NATURAL:
+        if num_cards == RULES.suit_size and num_natural(group) >= MIN_NATURAL:
             same_suit = True
             
             # Set a test case for the suit, this test case cannot be wild
@@ -42,15 +48,18 @@ def phazed_phase_type(phase):
     # Check if the phase is 4
     if num_groups == 2:
         # Check if both groups include 4 cards, and at least 2 natural cards
-        if (len(phase[0]) == 4 and num_natural(phase[0]) >= MIN_NATURAL and 
-            len(phase[1]) == 4 and num_natural(phase[1]) >= MIN_NATURAL):
+        set_size = RULES.set_sizes[PHASE_FOUR]
+        if (len(phase[0]) == set_size and 
+            num_natural(phase[0]) >= MIN_NATURAL and 
+            len(phase[1]) == set_size and 
+            num_natural(phase[1]) >= MIN_NATURAL):
             if same_value(phase[0]) and same_value(phase[1]):
                 phase_list.append(PHASE_FOUR)
     
     # Check if the phase is 5
     if num_groups == 1:
         group = phase[0]
-        if len(group) == 8 and num_natural(group) >= MIN_NATURAL:
+        if len(group) == RULES.run_size and num_natural(group) >= MIN_NATURAL:
             if run(group):
                 phase_list.append(PHASE_FIVE)
     
@@ -64,11 +73,13 @@ def phazed_phase_type(phase):
     if num_groups == 2:
         
         # Check that the first group is a run of 4 cards of the same color
-        if (len(phase[0]) == 4 and num_natural(phase[0]) >= MIN_NATURAL and 
+        if (len(phase[0]) == RULES.colour_run_size and 
+            num_natural(phase[0]) >= MIN_NATURAL and 
             run(phase[0]) and same_color(phase[0])):
             
             # Then check if the second group is 4 cards of the same value
-            if (len(phase[1]) == 4 and num_natural(phase[1]) and 
+            if (len(phase[1]) == RULES.value_set_size and 
+                num_natural(phase[1]) and 
                 same_value(phase[1])):
                 phase_list.append(PHASE_SEVEN)
     
@@ -104,36 +115,26 @@ def same_value(group):
 def run(group):
     '''Checks whether the cards are a run. 
     Returns True if yes. False otherwise'''
-    # Check that the run is no longer than 12 cards
-    if len(group) > MAX_RUN:
+    # Check that the run is no longer than the longest run allowed
+    if len(group) > RULES.max_run:
         return False
     
-    # two cycles of 2 to K will encompass all possible runs (excluding wilds)
-    run_test = "234567890JQK234567890JQK" 
-    
-    run_list = [card[0] for card in group]
-    # Get rid of any consecutive wild cards at the beginning of the run_list
-    while run_list[0] == 'A':
-        run_list.remove('A')
-        
-    # Knowing that the first element is not a wild card, we can replace all 
-    # remaining wild cards with a new card value that is 1 larger than the 
-    # previous card value
-    previous_value = run_list[0]
-    for i in range(len(run_list)):
-        value = run_list[i]
+    # Values cycle from K back to 2, so the card at position i in the run must
+    # be i places after the first card in RUN_ORDER, and wild cards can take 
+    # any place. Work out where the first card would be from each natural 
+    # card, and check that these all agree.
+    num_values = len(RUN_ORDER)
+    start = None
+    for i in range(len(group)):
+        value = group[i][0]
         if value == 'A':
-            value_list = list("234567890JQK2")
-            prev_index = value_list.index(previous_value)
-            value = value_list[prev_index + 1]
-            run_list[i] = value
-        previous_value = value         
-    
-    # Then, compare the altered list with the run_test to see if it's a run
-    altered_run_list = ''.join(run_list)
-    if altered_run_list in run_test:
-        return True
-    return False
+            continue
+        card_start = (RUN_ORDER.index(value) - i) % num_values
+        if start is None:
+            start = card_start
+        elif card_start != start:
+            return False
+    return True
 
 
 def same_color(group):
@@ -162,7 +163,7 @@ def accumulation(group):
     Returns True if yes, False if not.'''
     
     card_sum = sum(CARD_VALUES[card[0]] for card in group)
-    if card_sum == 34:
+    if card_sum == RULES.accum_target:
         return True
     return False
 
@@ -0,0 +1,569 @@
+# This is the main card playing module, which decides the play based on many factors 
+# including the table state, card history, hand, number of cards played and so on
+
+from itertools import groupby
+from collections import defaultdict as dd
+from itertools import combinations, permutations
+from functools import lru_cache
+from .constants import *
+from .rules import RULES
+from .strategy import STRATEGY
+from .phase_type import * 
+from .valid_play import *
+from .phase_distance import best_discard, pickup_distances
+from .card_tracker import card_tracker
+from .endgame import best_table_plays
+from .large_hand import large_hand_phase
+from .canonical import canonical_hand, restore_play
+from .shared_cache import shared_cache, MISS
+from .prefilter import may_complete
+from .validation import checked_play
+from .memory import probed
+from .capture import captured
+
+PHASE_CACHE_SIZE = 2 ** 14  # number of hands whose phase play is cached
+
+
+@probed
+@captured
+def phazed_play(player_id, table, turn_history, phase_status, hand, discard):
+    '''Returns a play based on the situation of the table, and the plays
+    that have been done so far. The play is a 2 tuple describing the single
+    play.
+    Raises InvalidPlayError (from validation.py) if the returned play is not 
+    valid. How often plays are checked is set with `configure_checks`, and
+    slow calls can be recorded with `configure_capture` (capture.py).
+    '''
+    play = choose_play(player_id, table, turn_history, phase_status, hand, 
+                       discard)
+    return checked_play(play, player_id, table, turn_history, phase_status, 
+                        hand, discard)
+
+
+def choose_play(player_id, table, turn_history, phase_status, hand, discard):
+    '''Works out the play for `phazed_play`, without checking it.'''
+    table_phase = table[player_id][0]
+    curr_phase = phase_status[player_id] + 1
+    
+    # First, check whether it is the start of the turn. If it is, execute
+    # a pickup play
+    if not turn_history or turn_history[-1][0] != player_id:
+        return pickup_play(player_id, table, turn_history, phase_status, hand, 
+                           discard)
+
+    # Then, check if a phase has been played. If it hasn't, try to execute
+    # a phase play
+    if not table_phase:
+        poss_play = possible_phase(player_id, phase_status, hand)
+        if poss_play:
+            return (PLAY_THREE, (curr_phase, poss_play))
+    
+    # If none of the above were executed, search for the table plays that
+    # leave the fewest points in hand, and make the first of them
+    if table_phase:
+        points, plays = best_table_plays(hand, table)
+        if plays:
+            return plays[0]
+    
+    # Finally, discard if no other plays are possible
+    return discard_play(player_id, table, turn_history, 
+                        phase_status, hand, discard)
+
+
+def pickup_play(player_id, table, turn_history, phase_status, hand, discard):
+    '''At the start of the turn, determines whether it's better to draw a card 
+    from the deck, or to draw a card from the discard pile, based on the 
+    current hand, the table etc. 
+    Returns a 2 tuple corresponding to the play types 1 and 2.'''
+    # Check that there is a discard pile
+    if not discard:
+        return (PLAY_ONE, None)
+    # If phase play is possible, check the table to see if the card on the 
+    # discard pile will help with playing a card to the table, or playing a 
+    # card to my own phase after I play it
+    table_phase = table[player_id][0]
+    curr_phase = phase_status[player_id] + 1
+    if not table_phase:
+        if possible_phase(player_id, phase_status, hand):
+            my_phase = possible_phase(player_id, phase_status, hand)
+            if check_phase(my_phase, discard, curr_phase):
+                return (PLAY_TWO, discard)
+            for i in range(len(table)):
+                phase_play = table[i]
+                tar_phase = phase_play[0]
+                if (tar_phase and 
+                    check_phase(phase_play[1], discard, tar_phase)):
+                    return (PLAY_TWO, discard)
+        # If phase play not possible, check the discard pile to see if the 
+        # card will allow me to play a phase. If not, then pickup from deck
+        else:
+            pickup_hand = hand.copy()
+            pickup_hand.append(discard)
+            if possible_phase(player_id, phase_status, pickup_hand):
+                return (PLAY_TWO, discard)
+            # take the discard if it brings the phase closer than the card
+            # expected from the deck
+            tracker = card_tracker(player_id, turn_history)
+            draw_odds = tracker.draw_distribution(hand)
+            distances = pickup_distances(hand, curr_phase, 
+                                         list(draw_odds) + [discard])
+            expected = sum(odds * distances[card] 
+                           for card, odds in draw_odds.items())
+            if (draw_odds and 
+                distances[discard] < expected - STRATEGY.pickup_margin):
+                return (PLAY_TWO, discard)
+            return (PLAY_ONE, None)
+    # if I have already played my phase, check the discard pile too
+    if table_phase:
+        for i in range(len(table)):
+            phase_play = table[i]
+            tar_phase = phase_play[0]
+            if tar_phase and check_phase(phase_play[1], discard, tar_phase):
+                return (PLAY_TWO, discard)
+    
+    # if none of the above, then check the value of the discard, take if low
+    if CARD_VALUES[discard[0]] <= STRATEGY.pickup_value:
+        return (PLAY_TWO, discard)
+    return (PLAY_ONE, None)
+
+
+def discard_play(player_id, table, turn_history, phase_status, hand, discard):
+    '''discard a card that is probably not useful for the current phase.'''
+    table_phase = table[player_id][0]
+    curr_phase = phase_status[player_id] + 1
+    # first check whether I have played a phase. If not, discard the card
+    # that leaves the hand closest to completing the phase
+    if not table_phase:
+        avoid = ()
+        if STRATEGY.keep_wanted:
+            avoid = card_tracker(player_id, turn_history).wanted_values()
+        return (PLAY_FIVE, best_discard(hand, curr_phase, avoid,
+                                        STRATEGY.odds_draws))
+    
+    discard_hand = hand.copy()
+    # in discard_hand, try to keep ACES if possible
+    for card in discard_hand:
+        if card[0] == 'A':
+            discard_hand.remove(card)
+    sorted_discard = sorted(discard_hand, key=lambda x: CARD_VALUES[x[0]])
+    if not sorted_discard:
+        return (PLAY_FIVE, hand[0]) 
+    return (PLAY_FIVE, sorted_discard[-1])
+    
+    
+def check_phase(phase, card, target_phase):
+    '''Checks whether a card can be played onto a group of cards, for the 
+    phase determined by target_phase. Returns the index position of the group
+    that the card should be played to, but in the case of phase 5, returns the
+    index position of the card within the group that the card should be palyed 
+    to. Returns False if not possible. The groups in `phase` are not changed.'''
+    if target_phase == PHASE_ONE or target_phase == PHASE_FOUR:
+        for i in range(len(phase)):
+            group = list(phase[i]) + [card]
+            if same_value(group):
+                return (i, 0)
+    
+    if target_phase == PHASE_TWO:
+        for i in range(len(phase)):
+            group = list(phase[i]) + [card]
+            if same_suit(group):
+                return (i, 0)
+    
+    # For a run, a card can only be inserted to the front or the end of the run
+    if target_phase == PHASE_FIVE:
+        group = phase[0]
+        for i in [0, len(group)]:
+            group_copy = list(group)
+            group_copy.insert(i, card)
+            if run(group_copy):
+                return (0, i)
+    
+    if target_phase == PHASE_SEVEN:
+        group0 = phase[0]
+        for i in [0, len(group0)]:
+            group_copy = list(group0)
+            group_copy.insert(i, card)
+            if run(group_copy) and same_color(group_copy):
+                return (0, i)
+        group1 = list(phase[1]) + [card]
+        if same_value(group1):
+            return (1, 0)
+    return False
+    
+def possible_phase(player_id, phase_status, hand):
+    '''Returns a possible phase play as a list of cards.
+    If phase play is not possible, return False.'''
+    curr_phase = phase_status[player_id] + 1
+    
+    # Hands that only differ by suits in ways the phase ignores share one 
+    # cached answer, which is then mapped back to the real cards
+    canon, real_cards = canonical_hand(hand, curr_phase)
+    play = solve_phase(curr_phase, canon, RULES.version)
+    return restore_play(play, real_cards)
+
+
+@probed
+@lru_cache(maxsize=PHASE_CACHE_SIZE)
+def solve_phase(curr_phase, hand, rules_version):
+    '''Returns a possible play for `curr_phase` from `hand` (a tuple of
+    cards) as a list of cards, or False if it is not possible. Results are 
+    cached, and `rules_version` keeps results from other rules apart. If a
+    shared cache is in use (see shared_cache.py), it is checked before the
+    hand is solved, and the answer is added to it.'''
+    shared = shared_cache()
+    if shared is None:
+        return find_phase(curr_phase, hand)
+    play = shared.get(curr_phase, hand)
+    if play is MISS:
+        play = find_phase(curr_phase, hand)
+        shared.put(curr_phase, hand, play)
+    return play
+
+
+def find_phase(curr_phase, hand):
+    '''Solves `solve_phase` for `hand` (a tuple of cards).'''
+    hand = list(hand)
+    
+    # large hands are solved from histograms of the hand instead, as 
+    # searching through combinations of cards would never finish
+    if len(hand) > RULES.large_hand:
+        return large_hand_phase(curr_phase, hand)
+    
+    # hands that fail a quick check the phase needs are not searched
+    if not may_complete(curr_phase, hand):
+        return False
+    
+    # if curr_phase is phase 1, check whether the phase is playable
+    if curr_phase == PHASE_ONE:
+        new_hand = groupby_values(hand)
+        group_len = RULES.set_sizes[PHASE_ONE]
+        if possible_values_play(new_hand, group_len):
+            return possible_values_play(new_hand, group_len)
+    
+    # if curr_phase is phase 2, check whether the phase is playable
+    if curr_phase == PHASE_TWO:
+        possible_play2 = possible_phase_two(hand)
+        if possible_play2:
+            return possible_play2
+    
+    # if curr_phase is phase 3, check whether phase 3 is playable
+    if curr_phase == PHASE_THREE:
+        possible_play3 = possible_phase_three(hand)
+        if possible_play3:
+            return possible_play3
+    
+    # if curr_phase is phase 4, check whether it is playable
+    if curr_phase == PHASE_FOUR:
+        new_hand = groupby_values(hand)
+        group_len = RULES.set_sizes[PHASE_FOUR]
+        if possible_values_play(new_hand, group_len):
+            return possible_values_play(new_hand, group_len)
+    
+    # if curr_phase is phase 5, check whether it is playable
+    if curr_phase == PHASE_FIVE:
+        run_len = RULES.run_size
+        if possible_run(hand, run_len):
+            return possible_run(hand, run_len)
+    
+    # if curr_phase is phase 6, check whether it is playable
+    if curr_phase == PHASE_SIX:
+        if possible_phase_six(hand):
+            return possible_phase_six(hand)
+        
+    # if curr_phase is phase 7, check whether it is playable
+    if curr_phase == PHASE_SEVEN:
+        if possible_phase_seven(hand):
+            return possible_phase_seven(hand)
+    return False
+
+
+@probed
+def possible_values_play(new_hand, group_len):
+    '''Takes a hand of cards, and returns a possible play for 2 sets of cards
+    of the same values, where the number of cards in each set is determined
+    by `group_len`. 
+    Returns False if there are no possible plays'''
+    # first check that the least number of cards is reached
+    play_len = group_len * 2
+    if len(new_hand) < play_len:
+        return False
+    
+    # want combinations of length `play_len`, so that the cards can be split 
+    # into 2 sets of cards of length `group_len`
+    for combination in combinations(new_hand, play_len):
+        comb_list = list(combination)
+        first_group = []
+        second_group = []
+        new_hand_copy = new_hand.copy()
+        # within the `play_len` number of cards, first find a set of cards of 
+        # the same value with length `group_len`
+        for first_comb in combinations(comb_list, group_len):
+            set_1 = list(first_comb)
+            if same_value(set_1) and num_natural(set_1) >= MIN_NATURAL:
+                for card in set_1:
+                    first_group.append(card)
+                    new_hand_copy.remove(card)
+                break
+        # check if the remaining cards can form a set of cards of same value
+        if first_group:
+            for second_comb in combinations(new_hand_copy, group_len):
+                set_2 = list(second_comb)
+                if same_value(set_2) and num_natural(set_2) >= MIN_NATURAL:
+                    for card in set_2:
+                        second_group.append(card)
+                    return [first_group, second_group]
+    return False
+
+
+def groupby_values(hand):
+    '''Groups the cards in the hand by their values, and returns a new list
+    that contains only the cards that have duplicates in the hand. as well
+    as Aces. This will lower the computational time for the other functions'''
+    grouped = groupby(sorted(hand), lambda x: x[0])
+    new_hand = []
+    for value, cards in grouped:
+        card_list = list(cards)
+        num_cards = len(card_list)
+        if value == 'A' or num_cards >= 2:
+            new_hand += card_list
+    # return a reverse sorted hand here, as we want to play cards with higher 
+    # values to minimise point gain
+    return sorted(new_hand, reverse=True) 
+
+
+@probed
+def possible_phase_two(hand):
+    '''Takes a hand of cards, and returns a possible play for phase 2.
+    If there is no possible play, return False.'''
+    freq_dict = dd(int)
+    wilds = 0
+    # Aces are not counted in the freq_dict, as they stand for all suits
+    for card in hand:
+        if card[0] != 'A':
+            freq_dict[card[1]] += 1
+        else:
+            wilds += 1
+
+    # Check if phase 2 is playable
+    if not freq_dict:
+        return False
+    most_frequent_suit = max(freq_dict, key=lambda x: freq_dict[x])
+    possible_play = []
+    if freq_dict[most_frequent_suit] + wilds >= 7:
+        for card in hand:
+            # prioritise playing non ace cards first
+            if (card[1] == most_frequent_suit and card[0] != 'A' 
+                and len(possible_play) < 7):
+                possible_play.append(card)
+        for card in hand:
+            if card[0] == 'A' and len(possible_play) < 7:
+                possible_play.append(card)
+        if num_natural(possible_play) >= MIN_NATURAL:
+            return [possible_play]
+    return False
+
+
+@probed
+def possible_phase_three(hand):
+    '''Takes a hand of cards and returns a possible play for phase 3. 
+    Returns False if it is not possible.'''
+    # We want to play as many cards as possible with an accumulation, so start
+    # searching for a combination of high number of cards that make up 34, if
+    # this is not found, then move down to combinations of lower numbers of
+    # cards.
+    for i in range(len(hand), 0, -1):
+        # every first accumulation is tried, as the first one found may use
+        # cards the second one needs
+        for first_accum in possible_accums(hand, i, RULES.accum_target):
+            new_hand = hand.copy()
+            for card in first_accum:
+                new_hand.remove(card)
+            # repeat the same process with new_hand, where the combination
+            # found has been removed from hand
+            for i2 in range(len(new_hand), 0, -1):
+                second_accum = possible_accum(new_hand, i2, RULES.accum_target)
+                if second_accum:
+                    return [first_accum, second_accum]
+    
+    # No combinations were found, return False    
+    return False
+
+
+def possible_accum(hand, i, num):
+    '''Determines whether the cards in `hand` are able to form an accumulation,
+    where the sum of accumulation is determined by `num`. i indicates the 
+    number of cards that should make up this sum. Returns the list of cards
+    that make up the accumulation. 
+    Returns False if it is not possible.'''
+    return next(possible_accums(hand, i, num), False)
+
+
+def possible_accums(hand, i, num):
+    '''Yields each list of `i` cards in `hand` that add up to `num`, once for
+    each different list of card values.'''
+    seen = set()
+    for combination in combinations(hand, i):
+        card_sum = sum(CARD_VALUES[x[0]] for x in combination)
+        if card_sum == num:
+            values = tuple(sorted(x[0] for x in combination))
+            if values not in seen:
+                seen.add(values)
+                yield list(combination)
+
+
+@probed
+def possible_run(hand, run_len):
+    '''Take a hand, and returns a possible play for a run, where the length of
+    the run is indicated by `run_len`.
+    Returns False if there is no possible run.'''
+    new_hand = []
+    value_list = []
+    wilds_list = []
+    # Remove duplicates of the same value, and sort the list of cards in terms
+    # of their value. also create a list of ACES if they exist
+    for card in hand:
+        if card[0] == 'A':
+            wilds_list.append(card)
+        elif card[0] not in value_list:    
+            new_hand.append(card)
+            value_list.append(card[0])
+    sorted_hand = sorted(new_hand, key=lambda x: CARD_VALUES[x[0]])
+    hand_copy = sorted_hand.copy()
+    ace_copy = wilds_list.copy()
+
+    # Pick a starting point in hand_copy, each time, hand_copy will cycle, in
+    # that the first card becomes the last card. The starting point is reset
+    for start_pt in range(len(sorted_hand)):
+        if start_pt > 0:
+            hand_copy.append(hand_copy.pop(0))
+        ace_list = wilds_list.copy()
+        num_wilds = len(ace_list)
+        possible_run = hand_copy.copy()
+        possible_run2 = hand_copy.copy()
+        prev_card = hand_copy[0]
+      
+        # For each starting point, see if a run can be achieved by adding 
+        # ACES to where there are values missing. Each time an ACE is added,
+        # the same ACE is also taken away from ACE_list
+        for i in range(1, len(hand_copy)):        
+            card_x = hand_copy[i]
+            value_diff = CARD_VALUES[card_x[0]] - CARD_VALUES[prev_card[0]]
+                    
+            # Consider the value_diff when the cards in the list cycles around,
+            # the value_diff will be negative between specific cards
+            if value_diff < 0:
+                value_diff = len(RUN_ORDER) + value_diff
+            if value_diff > 1:
+                wilds_needed = value_diff - 1
+                for num in range(wilds_needed):
+                    if ace_list:
+                        index = possible_run.index(card_x)
+                        possible_run.insert(index, ace_list.pop())
+                        num_wilds -= 1
+            prev_card = card_x  
+            # Check if the first sequence of cards of possible_run is a run
+            if (len(possible_run) >= run_len and run(possible_run[:run_len]) 
+                and num_natural(possible_run[:run_len]) >= MIN_NATURAL):
+                return [possible_run[:run_len]]  
+            
+            # Consider the special case of when the iteration reaches the last
+            # card in the original sorted hand. A run may still be achieved by
+            # adding ACES to the end.
+            if i == len(hand_copy) - 1 and hand_copy == sorted_hand:
+                for ace in range(len(ace_copy)):
+                    possible_run2.append(ace_copy.pop())
+                if (len(possible_run2) >= run_len 
+                    and run(possible_run2[:run_len])
+                    and num_natural(possible_run2[:run_len]) >= MIN_NATURAL):
+                    return [possible_run2[:run_len]]
+    return False
+
+
+@probed
+def possible_phase_six(hand):
+    '''Takes a hand, and returns a possible play for phase 6. 
+    If it is not possible, return False.'''
+    # first, create a dictionary mapping each color to a list of cards of the 
+    # same color in the hand
+    color_dict = dd(list)
+    for card in hand:
+        if card[1] in BLACK:
+            color_dict[BLACK].append(card)
+        else:
+            color_dict[RED].append(card)
+    
+    # Just like in phase 3, we want to play as many cards as possible. 
+    # Search for a combination of high number of cards that make up 34, if
+    # this is not found, then try combinations of lower numbers of cards.
+    first_accum = []
+    second_accum = []
+    
+    # See if there is one set of accumulations from one color, and another set
+    # of accumulations from a different color
+    black_cards = color_dict[BLACK]
+    for j in range(len(black_cards), 0, -1):
+        if possible_accum(black_cards, j, RULES.accum_target):
+            first_accum = possible_accum(black_cards, j, RULES.accum_target)
+    red_cards = color_dict[RED]
+    for k in range(len(red_cards), 0, -1):
+        if possible_accum(red_cards, k, RULES.accum_target):
+            second_accum = possible_accum(red_cards, k, RULES.accum_target)
+    if first_accum and second_accum:
+        return [first_accum, second_accum]
+   
+    first_accum = []
+    second_accum = []
+    # See if either of the colors can make up 2 sets of accumulations, just 
+    # like testing for phase 3
+    for color in color_dict:
+        cards = color_dict[color]
+        if possible_phase_three(cards):
+            return possible_phase_three(cards)
+    return False
+
+
+@probed
+def possible_phase_seven(hand):
+    '''Takes a hand of cards, and returns a possible play for phase 7.
+    Returns False if there are no possible plays'''
+    # Approach this is a similar manner to the function `possible_values_play`
+    # First check that the least number of cards is reached (8 cards)
+    set_len = RULES.value_set_size
+    run_len = RULES.colour_run_size
+    phase7_len = set_len + run_len
+    if len(hand) < phase7_len:
+        return False
+    
+    # first find a set of four cards of the same value. Every set is tried,
+    # as the first one found may use cards the run needs
+    tried = set()
+    for first_comb in combinations(hand, set_len):
+        first_group = list(first_comb)  # first group is same values
+        if not (same_value(first_group) and
+                num_natural(first_group) >= MIN_NATURAL):
+            continue
+        if tuple(sorted(first_group)) in tried:
+            continue
+        tried.add(tuple(sorted(first_group)))
+        hand_copy = hand.copy()
+        for card in first_group:
+            hand_copy.remove(card)
+        # check if the remaining cards can form a run of 4 cards of same color
+        for second_comb in combinations(hand_copy, run_len):
+            second_group = list(second_comb)  # second group is run
+            if (same_color(second_group) and 
+                num_natural(second_group) >= MIN_NATURAL):
+                second_group = run_order(second_group)
+                if second_group:
+                    return [second_group, first_group]
+    return False
+
+
+def run_order(group):
+    '''Returns the cards in `group` in an order that makes them a run, so
+    that a run is found whatever order the hand is in.
+    Returns False if there is no such order.'''
+    for order in permutations(group):
+        if run(list(order)):
+            return list(order)
+    return False
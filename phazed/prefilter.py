@@ -0,0 +1,161 @@
+# Contains the prefilters run before the phase solvers. Each one checks, in
+# time linear in the hand, a condition every playable hand must meet (enough
+# cards of one value, suit or colour, enough distinct values for a run, a
+# large enough total for accumulations), so that most hands that can't make
+# the phase are turned away without a search. A hand that passes may still
+# not make the phase; the solver decides that.
+#
+# Hands larger than RULES.large_hand aren't checked, as the solvers in
+# large_hand.py work from histograms rather than searching.
+
+from collections import defaultdict as dd
+from .constants import *
+from .rules import RULES
+from .phase_distance import group_missing, most_in_run, sets_missing
+
+_enabled = True
+_checked = 0
+_rejected = 0
+
+
+def enable_prefilter(enabled=True):
+    '''Turns the prefilters on or off (for measuring what they save).'''
+    global _enabled
+    _enabled = enabled
+
+
+def prefilter_stats():
+    '''Returns the number of hands checked and rejected so far.'''
+    return _checked, _rejected
+
+
+def reset_prefilter_stats():
+    '''Sets the numbers from `prefilter_stats` back to 0.'''
+    global _checked, _rejected
+    _checked = _rejected = 0
+
+
+def may_complete(phase, hand):
+    '''Returns False if `hand` certainly can't make `phase`, and True if it
+    might (or the prefilters are off).'''
+    global _checked, _rejected
+    if not _enabled or phase not in _CHECKS:
+        return True
+    _checked += 1
+    if not _CHECKS[phase](hand):
+        _rejected += 1
+        return False
+    return True
+
+
+def _split(hand):
+    '''Returns the number of wilds and the count of each natural value.'''
+    wilds = 0
+    values = dd(int)
+    for card in hand:
+        if card[0] == 'A':
+            wilds += 1
+        else:
+            values[card[0]] += 1
+    return wilds, values
+
+
+def _two_sets(hand, size):
+    '''Two sets of `size`: the two most common values (or one value with
+    enough cards for both sets) plus the wilds must fill them.'''
+    if len(hand) < 2 * size:
+        return False
+    wilds, values = _split(hand)
+    counts = sorted(values.values(), reverse=True) + [0, 0]
+    return sets_missing(counts[0], counts[1], size, wilds) == 0
+
+
+def _one_suit(hand):
+    '''Cards of one suit: the naturals of the best suit plus the wilds must
+    make up the group.'''
+    size = RULES.suit_size
+    if len(hand) < size:
+        return False
+    wilds = 0
+    suits = dd(int)
+    for card in hand:
+        if card[0] == 'A':
+            wilds += 1
+        else:
+            suits[card[1]] += 1
+    best = max(suits.values(), default=0)
+    return group_missing([(best, size)], wilds) == 0
+
+
+def _accumulations(colour_pairs):
+    '''Two accumulations: the cards each one may take must add up to at least
+    the target, and the cards of both together to twice the target. Aces
+    count 1 and may go into either.'''
+    def check(hand):
+        target = RULES.accum_target
+        wild_sum = 0
+        sums = {RED: 0, BLACK: 0}
+        for card in hand:
+            if card[0] == 'A':
+                wild_sum += CARD_VALUES['A']
+            else:
+                sums[RED if card[1] in RED else BLACK] += CARD_VALUES[card[0]]
+        for first, second in colour_pairs:
+            first_sum = sum(sums[colour] for colour in sums
+                            if colour in first) + wild_sum
+            second_sum = sum(sums[colour] for colour in sums
+                             if colour in second) + wild_sum
+            both = sum(sums[colour] for colour in sums
+                       if colour in first + second) + wild_sum
+            if (first_sum >= target and second_sum >= target and
+                    both >= 2 * target):
+                return True
+        return False
+    return check
+
+
+def _value_mask(hand, colour=RED + BLACK):
+    '''Returns the bit mask of the natural values of `colour` in `hand`, with
+    bit i set if RUN_ORDER[i] is held.'''
+    mask = 0
+    for card in hand:
+        if card[0] != 'A' and card[1] in colour:
+            mask |= 1 << RUN_ORDER.index(card[0])
+    return mask
+
+
+def _run(hand):
+    '''A run: the distinct values in the best window plus the wilds must
+    fill it.'''
+    size = RULES.run_size
+    if len(hand) < size:
+        return False
+    wilds = sum(card[0] == 'A' for card in hand)
+    return group_missing([(most_in_run(_value_mask(hand), size), size)],
+                         wilds) == 0
+
+
+def _run_and_set(hand):
+    '''A colour run and a set: the best set and the best colour run must be
+    filled from one pool of wilds.'''
+    run_size = RULES.colour_run_size
+    set_size = RULES.value_set_size
+    if len(hand) < run_size + set_size:
+        return False
+    wilds, values = _split(hand)
+    best_set = max(list(values.values()) + [0])
+    best_run = max(most_in_run(_value_mask(hand, colour), run_size)
+                   for colour in (RED, BLACK))
+    return group_missing([(best_set, set_size), (best_run, run_size)],
+                         wilds) == 0
+
+
+_CHECKS = {
+    PHASE_ONE: lambda hand: _two_sets(hand, RULES.set_sizes[PHASE_ONE]),
+    PHASE_TWO: _one_suit,
+    PHASE_THREE: _accumulations([(RED + BLACK, RED + BLACK)]),
+    PHASE_FOUR: lambda hand: _two_sets(hand, RULES.set_sizes[PHASE_FOUR]),
+    PHASE_FIVE: _run,
+    PHASE_SIX: _accumulations([(RED, RED), (BLACK, BLACK), (RED, BLACK)]),
+    PHASE_SEVEN: _run_and_set,
+}
@@ -0,0 +1,54 @@
+# Contains the rules object, which holds the parts of the game that change
+# between variants (number of decks, hand size, group sizes and accumulation
+# targets). The solvers read RULES at call time, so a variant is set up by
+# calling `configure` once before play starts.
+
+import zlib
+from .constants import *
+
+
+class Rules:
+    '''The settings for one variant of the game. The defaults are the standard
+    game: two decks and hands of 10 cards.'''
+    def __init__(self, **changes):
+        self.num_decks = NUM_DECKS
+        self.hand_size = HAND_SIZE
+        self.set_sizes = {PHASE_ONE: 3, PHASE_FOUR: 4}  # two sets of a value
+        self.suit_size = 7  # phase 2
+        self.run_size = 8  # phase 5
+        self.colour_run_size = 4  # phase 7, first group
+        self.value_set_size = 4  # phase 7, second group
+        self.accum_target = ACCUM_34  # phases 3 and 6
+        self.accumulation_sequence = list(ACCUMULATION_SEQUENCE)
+        self.max_run = MAX_RUN
+        # hands with more cards than this are solved with the histogram
+        # solvers in large_hand.py instead of searching combinations
+        self.large_hand = 12
+        self.version = 0  # goes up on every change, for keying caches
+        self.update(**changes)
+
+    def update(self, **changes):
+        '''Changes the named settings. Gives an error for unknown settings.'''
+        for name, value in changes.items():
+            if not hasattr(self, name):
+                raise AttributeError('unknown rule: {}'.format(name))
+            setattr(self, name, value)
+        self.version += 1
+
+    def fingerprint(self):
+        '''Returns a number that is the same in every process using the same
+        settings, for keying data kept outside the process. The version can't
+        be used for that, as it counts changes in this process.'''
+        settings = sorted((name, value) for name, value in vars(self).items()
+                          if name != 'version')
+        return zlib.crc32(repr(settings).encode())
+
+
+# the rules in use
+RULES = Rules()
+
+
+def configure(**changes):
+    '''Changes the rules in use, for example configure(hand_size=40).'''
+    RULES.update(**changes)
+    return RULES
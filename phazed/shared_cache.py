@@ -0,0 +1,227 @@
+# Contains the optional cache of phase solutions shared between processes. It
+# is a fixed size hash table in a multiprocessing.shared_memory block, so a
+# hand solved by one process is found by all the others, and the table
+# outlives any one worker. Each entry is keyed by the canonical hand (as card
+# indices) and the phase, and holds the play as card indices.
+#
+# The table is split into buckets of WAYS slots, and a key can only be stored
+# in its own bucket. When a bucket is full, a slot is freed by the clock
+# algorithm: the bucket's hand sweeps the slots, clearing their reference
+# bits, and evicts the first slot whose bit was already clear. Entries start
+# with the bit clear and readers set it on a hit, so entries in use survive.
+#
+# Writes to a bucket take one of a fixed set of striped locks. Reads take no
+# lock: every slot has a sequence number that a writer makes odd while it
+# changes the slot, so a reader that sees an odd number, or a number that
+# changed while it was copying the slot, treats the lookup as a miss.
+
+import atexit
+import struct
+import zlib
+from .constants import *
+from .rules import RULES
+
+NUM_SLOTS = 2 ** 16
+WAYS = 8  # slots per bucket
+NUM_STRIPES = 64  # number of locks the buckets share
+MAX_CARDS = 16  # hands with more cards than this are not cached
+MAX_GROUPS = 2
+EMPTY = 0xFF  # card index used to pad the key and play
+
+# sequence number, reference bit, phase, number of groups, rules fingerprint,
+# hand, group lengths, play
+SLOT = struct.Struct('<IBBBxI{0}s{1}s{0}s'.format(MAX_CARDS, MAX_GROUPS))
+SEQUENCE = struct.Struct('<I')
+REFERENCE_OFFSET = 4
+MISS = object()  # returned by `get` when the hand is not in the cache
+VALUE_ORDER = ''.join(CARD_VALUES)
+
+_shared = None  # the cache in use in this process, if any
+
+
+class SharedPhaseCache:
+    '''A phase solution cache in shared memory. Create one in the parent
+    process with `create_shared_cache`, and attach to it in other processes
+    by passing `handle()` to `attach_shared_cache` when they are started (the
+    locks can only be passed to a process as it starts).'''
+    def __init__(self, memory, num_slots, locks, owner):
+        self.memory = memory
+        self.buffer = memory.buf
+        self.num_buckets = num_slots // WAYS
+        self.locks = locks
+        self.owner = owner
+        # the clock hand of each bucket comes before the slots
+        self.slots_offset = self.num_buckets
+
+    def handle(self):
+        '''Returns what another process needs to attach to the cache.'''
+        return self.memory.name, self.num_buckets * WAYS, self.locks
+
+    def get(self, phase, hand):
+        '''Returns the cached play for `phase` from the canonical `hand`
+        (False if there is none), or MISS.'''
+        key = _encode_key(phase, hand)
+        if key is None:
+            return MISS
+        bucket = self._bucket(key)
+        for slot in range(bucket * WAYS, (bucket + 1) * WAYS):
+            offset = self.slots_offset + slot * SLOT.size
+            fields = self._read(offset)
+            if fields is not None and fields[2:] == key:
+                self.buffer[offset + REFERENCE_OFFSET] = 1
+                return _decode_play(fields[0], fields[1])
+        return MISS
+
+    def put(self, phase, hand, play):
+        '''Stores `play` as the answer for `phase` from the canonical
+        `hand`.'''
+        key = _encode_key(phase, hand)
+        if key is None:
+            return
+        bucket = self._bucket(key)
+        first = bucket * WAYS
+        with self.locks[bucket % len(self.locks)]:
+            slot = self._find_slot(key, first)
+            offset = self.slots_offset + slot * SLOT.size
+            sequence = SEQUENCE.unpack_from(self.buffer, offset)[0]
+            SEQUENCE.pack_into(self.buffer, offset, sequence + 1)
+            num_groups, lengths, cards = _encode_play(play)
+            SLOT.pack_into(self.buffer, offset, sequence + 1, 0, key[0],
+                           num_groups, key[1], key[2], lengths, cards)
+            SEQUENCE.pack_into(self.buffer, offset, sequence + 2)
+
+    def close(self):
+        '''Detaches from the shared memory, and frees it if this process
+        created it.'''
+        if self.buffer is None:
+            return
+        if _shared is self:
+            use_shared_cache(None)
+        self.buffer = None
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+    def _bucket(self, key):
+        return zlib.crc32(bytes([key[0]]) + key[2] +
+                          key[1].to_bytes(4, 'little')) % self.num_buckets
+
+    def _read(self, offset):
+        '''Returns the (number of groups, group lengths, cards, phase, rules
+        fingerprint, hand) of a slot, or None if the slot is empty or being
+        written.'''
+        sequence, _, phase, num_groups, rules, hand, lengths, cards = \
+            SLOT.unpack_from(self.buffer, offset)
+        if (not phase or sequence % 2 or
+                SEQUENCE.unpack_from(self.buffer, offset)[0] != sequence):
+            return None
+        return num_groups, (lengths, cards), phase, rules, hand
+
+    def _find_slot(self, key, first):
+        '''Returns the slot to write `key` to: the slot already holding it,
+        an empty slot, or the slot chosen by the clock. Called with the
+        bucket's lock held.'''
+        for slot in range(first, first + WAYS):
+            offset = self.slots_offset + slot * SLOT.size
+            phase = self.buffer[offset + REFERENCE_OFFSET + 1]
+            if not phase:
+                return slot
+            fields = self._read(offset)
+            if fields is not None and fields[2:] == key:
+                return slot
+        bucket = first // WAYS
+        while True:
+            hand = self.buffer[bucket]
+            self.buffer[bucket] = (hand + 1) % WAYS
+            offset = self.slots_offset + (first + hand) * SLOT.size
+            if not self.buffer[offset + REFERENCE_OFFSET]:
+                return first + hand
+            self.buffer[offset + REFERENCE_OFFSET] = 0
+
+
+def create_shared_cache(num_slots=NUM_SLOTS, num_stripes=NUM_STRIPES):
+    '''Creates an empty cache with room for `num_slots` solutions (rounded
+    down to whole buckets), and starts using it in this process.'''
+    from multiprocessing import Lock
+    from multiprocessing.shared_memory import SharedMemory
+    num_slots -= num_slots % WAYS
+    size = num_slots // WAYS + num_slots * SLOT.size
+    memory = SharedMemory(create=True, size=size)
+    memory.buf[:size] = bytes(size)
+    locks = tuple(Lock() for _ in range(num_stripes))
+    cache = SharedPhaseCache(memory, num_slots, locks, True)
+    atexit.register(cache.close)
+    return use_shared_cache(cache)
+
+
+def attach_shared_cache(handle):
+    '''Attaches to the cache described by `handle` (from `handle()` in the
+    process that created it), and starts using it in this process.'''
+    from multiprocessing.shared_memory import SharedMemory
+    name, num_slots, locks = handle
+    # processes started from the creator share its resource tracker, which
+    # frees the memory once, when the creator unlinks it
+    memory = SharedMemory(name=name)
+    return use_shared_cache(SharedPhaseCache(memory, num_slots, locks, False))
+
+
+def use_shared_cache(cache):
+    '''Makes `cache` the shared cache used by this process (None to stop
+    using one). Returns the cache.'''
+    global _shared
+    _shared = cache
+    return cache
+
+
+def shared_cache():
+    '''Returns the shared cache in use in this process, or None.'''
+    return _shared
+
+
+def card_index(card):
+    '''Returns the index of `card` from 0 to 51.'''
+    return (CARD_VALUES[card[0]] - 1) * len(SUITS) + SUITS.index(card[1])
+
+
+def index_card(index):
+    '''Returns the card with `card_index` equal to `index`.'''
+    value, suit = divmod(index, len(SUITS))
+    return VALUE_ORDER[value] + SUITS[suit]
+
+
+def _encode_key(phase, hand):
+    '''Returns the key for `hand` as (phase, rules fingerprint, packed
+    hand), or None if the hand is too large to cache.'''
+    if len(hand) > MAX_CARDS:
+        return None
+    return phase, RULES.fingerprint(), _pack(hand)
+
+
+def _pack(cards):
+    '''Packs cards into MAX_CARDS bytes of card indices.'''
+    return bytes([card_index(card) for card in cards] +
+                 [EMPTY] * (MAX_CARDS - len(cards)))
+
+
+def _encode_play(play):
+    '''Returns the number of groups, the group lengths and the packed cards
+    of `play` (False is stored as a play with no groups).'''
+    if not play:
+        return 0, bytes(MAX_GROUPS), _pack([])
+    lengths = [len(group) for group in play]
+    return (len(play), bytes(lengths + [0] * (MAX_GROUPS - len(play))),
+            _pack([card for group in play for card in group]))
+
+
+def _decode_play(num_groups, packed):
+    '''Turns the fields stored by `_encode_play` back into a play.'''
+    if not num_groups:
+        return False
+    lengths, cards = packed
+    play = []
+    start = 0
+    for length in lengths[:num_groups]:
+        play.append([index_card(index)
+                     for index in cards[start:start + length]])
+        start += length
+    return play
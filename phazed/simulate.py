@@ -0,0 +1,105 @@
+# Contains a self-play simulator for the card player. A hand is dealt from a
+# seed, so the same deal can be replayed with different strategies in each
+# seat (duplicate deals), and the players take turns until one goes out or
+# the deck runs out. Used to tune the strategy settings in tune.py.
+
+import random
+from .constants import *
+from .rules import RULES
+from .strategy import STRATEGY, Strategy
+from .player import phazed_play
+from .validation import InvalidPlayError
+
+NUM_PLAYERS = 4
+MAX_TURNS = 400  # a hand that goes on longer than this is stopped
+# points for the cards left in hand at the end of a hand
+CARD_POINTS = {'A': 25, '0': 10, 'J': 10, 'Q': 10, 'K': 10}
+
+
+def card_points(card):
+    '''Returns the points `card` scores against a player holding it at the
+    end of a hand.'''
+    return CARD_POINTS.get(card[0], CARD_VALUES[card[0]])
+
+
+def deal(seed, num_players=NUM_PLAYERS):
+    '''Deals a hand from `seed`. Returns the phase status of each player
+    (drawn at random, so every phase gets played), the hands, the discard and
+    the rest of the deck, with the next card to draw last.'''
+    rng = random.Random(seed)
+    deck = [value + suit for value in CARD_VALUES for suit in SUITS
+            for _ in range(RULES.num_decks)]
+    rng.shuffle(deck)
+    phase_status = [rng.randrange(PHASE_SEVEN) for _ in range(num_players)]
+    hands = [[deck.pop() for _ in range(RULES.hand_size)]
+             for _ in range(num_players)]
+    return phase_status, hands, deck.pop(), deck
+
+
+def play_hand(seed, strategies):
+    '''Plays the hand dealt from `seed`, with `strategies[i]` (a Strategy)
+    in use while player i decides. Returns a list with, for each player, a
+    pair of whether they played their phase and the points left in their
+    hand. The strategy in use is put back afterwards.'''
+    saved = vars(Strategy(**vars(STRATEGY)))
+    try:
+        return _play_hand(seed, strategies)
+    finally:
+        STRATEGY.update(**saved)
+
+
+def _play_hand(seed, strategies):
+    num_players = len(strategies)
+    phase_status, hands, discard, deck = deal(seed, num_players)
+    table = [(None, []) for _ in range(num_players)]
+    turn_history = []
+    player_id = 0
+    for _ in range(MAX_TURNS):
+        STRATEGY.update(**vars(strategies[player_id]))
+        hand = hands[player_id]
+        plays = []
+        while True:
+            try:
+                play = phazed_play(player_id, table, turn_history,
+                                   phase_status, hand, discard)
+            except InvalidPlayError as error:
+                play = error.fallback
+                if play is None:
+                    # the player has no valid play, so the hand can't go on
+                    return _results(table, hands)
+            if not plays:
+                turn_history.append((player_id, plays))
+            plays.append(play)
+            play_type, move = play
+            if play_type == PLAY_ONE:
+                if not deck:
+                    return _results(table, hands)
+                hand.append(deck.pop())
+            elif play_type == PLAY_TWO:
+                hand.append(discard)
+                discard = None
+            elif play_type == PLAY_THREE:
+                phase, groups = move
+                for group in groups:
+                    for card in group:
+                        hand.remove(card)
+                table[player_id] = (phase, [list(group) for group in groups])
+            elif play_type == PLAY_FOUR:
+                card, (target, group, index) = move
+                hand.remove(card)
+                table[target][1][group].insert(index, card)
+            else:
+                hand.remove(move)
+                discard = move
+            if not hand:
+                return _results(table, hands)
+            if play_type == PLAY_FIVE:
+                break
+        player_id = (player_id + 1) % num_players
+    return _results(table, hands)
+
+
+def _results(table, hands):
+    '''Returns whether each player played their phase, and their points.'''
+    return [(table[i][0] is not None, sum(card_points(card) for card in hand))
+            for i, hand in enumerate(hands)]
@@ -0,0 +1,46 @@
+# Contains the strategy object, which holds the thresholds used by the card
+# player's heuristics. Unlike the rules, these don't change what is a valid
+# play, only which play is chosen, so they can be tuned by self-play (see
+# tune.py). The player reads STRATEGY at call time.
+
+
+class Strategy:
+    '''The settings for the player's heuristics. The defaults are the values
+    the player plays with, which tune.py measures the others against.'''
+    def __init__(self, **changes):
+        # once the phase is down, take any discard of at most this value
+        self.pickup_value = 6
+        # before the phase is down, take the discard only if it brings the
+        # phase closer than the expected deck card by more than this many
+        # cards
+        self.pickup_margin = 0.0
+        # when discards are tied, keep the values other players are collecting
+        self.keep_wanted = True
+        # when discards are tied on distance, keep the hand with the best odds
+        # of completing the phase within this many draws (0 to not look)
+        self.odds_draws = 3
+        self.update(**changes)
+
+    def update(self, **changes):
+        '''Changes the named settings. Gives an error for unknown settings.'''
+        for name, value in changes.items():
+            if not hasattr(self, name):
+                raise AttributeError('unknown strategy setting: {}'.format(
+                    name))
+            setattr(self, name, value)
+
+    def __repr__(self):
+        return 'Strategy({})'.format(', '.join(
+            '{}={!r}'.format(name, value)
+            for name, value in sorted(vars(self).items())))
+
+
+# the strategy in use
+STRATEGY = Strategy()
+
+
+def configure_strategy(**changes):
+    '''Changes the strategy in use, for example
+    configure_strategy(pickup_value=5).'''
+    STRATEGY.update(**changes)
+    return STRATEGY
@@ -1,5 +1,11 @@
 # Includes functions that check whether or not a play is valid
 
+from .constants import *
+from .rules import RULES
+from .phase_type import *
+from .memory import probed
+
+@probed
 def phazed_is_valid_play(play, player_id, table, turn_history, phase_status, 
                          hand, discard):
     '''Checks whether a play is valid, based on the four conditions given. 
@@ -114,7 +120,8 @@ def third_condition(play, player_id, table, turn_history, phase_status, hand):
         # 2. check that the card is consistent with the phase. 
         card = play[1][0]
         target_phase = target[0]
-        target_group = target[1][declared_group]
+        # test the play on a copy of the group, leaving the table unchanged
+        target_group = list(target[1][declared_group])
         # Consider phase 1, phase 4, and group '1th' of phase 7:
         # (cards of the same value)
         if (target_phase == PHASE_ONE or target_phase == PHASE_FOUR or 
@@ -141,15 +148,16 @@ def third_condition(play, player_id, table, turn_history, phase_status, hand):
         if target_phase == PHASE_THREE or target_phase == PHASE_SIX:
             card_sum = sum(CARD_VALUES[card_x[0]] for card_x in target_group)
             # Find the current accumulation, and locate its index
-            for accum in ACCUMULATION_SEQUENCE:
+            accum_sequence = RULES.accumulation_sequence
+            for accum in accum_sequence:
                 if card_sum >= accum:
                     curr_accum = accum
-            accum_index = ACCUMULATION_SEQUENCE.index(curr_accum) 
+            accum_index = accum_sequence.index(curr_accum) 
             # if it's the end of the sequence, then the play is invalid
-            if accum_index == len(ACCUMULATION_SEQUENCE) - 1: 
+            if accum_index == len(accum_sequence) - 1: 
                 return False
             # else, the end is not reached, continue testing
-            next_accum = ACCUMULATION_SEQUENCE[accum_index + 1]
+            next_accum = accum_sequence[accum_index + 1]
             new_card_sum = card_sum + CARD_VALUES[card[0]]
             # if the card is the last card, the accumulation must be complete
             if len(hand) == 1:
@@ -191,7 +199,7 @@ def fourth_condition(play, player_id, table, turn_history, hand):
             if player[0] == PHASE_THREE or player[0] == PHASE_SIX:
                 for group in player[1]:
                     card_sum = sum(CARD_VALUES[card_x[0]] for card_x in group)
-                    if card_sum not in ACCUMULATION_SEQUENCE:
+                    if card_sum not in RULES.accumulation_sequence:
                         return False
     return True
     
@@ -0,0 +1,73 @@
+# Contains the self-checks run on the plays the card player makes. By default
+# every play is checked with `phazed_is_valid_play` before it is returned. In
+# trusted mode the plays, which are built to be valid, are only checked for a
+# sample of decisions. A play that fails its check raises InvalidPlayError,
+# which carries the state it was made in and a safe play to make instead.
+
+import random
+from .constants import *
+from .valid_play import phazed_is_valid_play
+from .game_state import GameState
+
+CHECK_ALWAYS = 'always'
+CHECK_TRUSTED = 'trusted'
+
+_mode = CHECK_ALWAYS
+_audit_rate = 0.0
+_rng = random.Random()
+
+
+class InvalidPlayError(Exception):
+    '''Raised when the player is about to make an invalid play. `play` is
+    the play, `state` is a GameState snapshot of the arguments it was made
+    with, and `fallback` is a valid play to make instead (or None if none
+    could be found).'''
+    def __init__(self, play, state, fallback):
+        super().__init__('invalid play {} by player {}, hand {}'.format(
+            play, state.player_id, list(state.hand)))
+        self.play = play
+        self.state = state
+        self.fallback = fallback
+
+
+def configure_checks(mode=CHECK_ALWAYS, audit_rate=0.0, seed=None):
+    '''Sets how plays are checked: CHECK_ALWAYS checks every play, and
+    CHECK_TRUSTED only checks a random `audit_rate` fraction of them.'''
+    global _mode, _audit_rate
+    if mode not in (CHECK_ALWAYS, CHECK_TRUSTED):
+        raise ValueError('unknown check mode: {}'.format(mode))
+    _mode = mode
+    _audit_rate = audit_rate
+    if seed is not None:
+        _rng.seed(seed)
+
+
+def checked_play(play, player_id, table, turn_history, phase_status, hand,
+                 discard):
+    '''Returns `play` once it has been checked (or once it is decided that
+    it doesn't need to be). Raises InvalidPlayError if it is invalid.'''
+    if _mode == CHECK_TRUSTED and _rng.random() >= _audit_rate:
+        return play
+    if phazed_is_valid_play(play, player_id, table, turn_history,
+                            phase_status, hand, discard):
+        return play
+    fallback = fallback_play(player_id, table, turn_history, phase_status,
+                             hand, discard)
+    state = GameState.from_args(player_id, table, turn_history,
+                                phase_status, hand, discard)
+    raise InvalidPlayError(play, state, fallback)
+
+
+def fallback_play(player_id, table, turn_history, phase_status, hand,
+                  discard):
+    '''Returns a simple valid play: picking up from the deck at the start of
+    the turn, and otherwise discarding, highest value card first. Returns
+    None if none of these are valid.'''
+    plays = [(PLAY_ONE, None)]
+    for card in sorted(hand, key=lambda x: CARD_VALUES[x[0]], reverse=True):
+        plays.append((PLAY_FIVE, card))
+    for play in plays:
+        if phazed_is_valid_play(play, player_id, table, turn_history,
+                                phase_status, hand, discard):
+            return play
+    return None
@@ -0,0 +1,160 @@
+# Replays the phazed_play calls recorded by the capture hook (see
+# phazed/capture.py) under cProfile, slowest first. Prints the time of each
+# call when captured and when replayed, and how the time splits between the
+# solvers (the functions marked for the memory probe), and writes the
+# profile as collapsed stacks (one 'caller;callee;... microseconds' line per
+# stack), which flame graph tools read.
+# Run with: python replay.py capture file [--top N] [--warm] [--collapsed path]
+
+import argparse
+import cProfile
+import pstats
+import sys
+import time
+from phazed import player
+from phazed.capture import read_capture
+from phazed.validation import InvalidPlayError
+from phazed.rules import RULES
+from phazed.strategy import STRATEGY
+
+TOP = 20  # number of the slowest calls replayed
+
+
+def unwrap_probes():
+    '''Takes the memory probe's wrappers off the probed functions in every
+    phazed module. The wrappers all share one code object, which would merge
+    their call stacks in the profile. Returns the set of pstats keys of the
+    functions that were probed (the solvers).'''
+    solvers = set()
+    for name, module in list(sys.modules.items()):
+        if not name.startswith('phazed.'):
+            continue
+        for attr, value in list(vars(module).items()):
+            if getattr(value, 'probed', False):
+                function = value.__wrapped__
+                setattr(module, attr, function)
+                code = getattr(function, '__wrapped__', function).__code__
+                solvers.add((code.co_filename, code.co_firstlineno,
+                             code.co_name))
+    return solvers
+
+
+def replay(records, warm=False):
+    '''Replays `records` under one profile, in the rules and strategy they
+    were captured with. With `warm`, each call is made once before it is
+    profiled, so the solver caches are filled. Returns the profile and the
+    replayed times in milliseconds.'''
+    profile = cProfile.Profile()
+    times = []
+    for record in records:
+        RULES.update(**record['rules'])
+        STRATEGY.update(**record['strategy'])
+        if warm:
+            _call(record['args'])
+        start = time.perf_counter()
+        profile.enable()
+        _call(record['args'])
+        profile.disable()
+        times.append((time.perf_counter() - start) * 1000)
+    return profile, times
+
+
+def _call(args):
+    try:
+        player.phazed_play(*args)
+    except InvalidPlayError:
+        pass
+
+
+def collapsed_stacks(stats):
+    '''Returns the profile in `stats` (pstats.Stats) as collapsed stack lines.
+    cProfile only keeps caller and callee pairs, so the time of a function
+    is shared between the stacks that reach it in proportion to the time
+    each caller spent in it.'''
+    callees = {}
+    for function, (_, _, _, _, callers) in stats.stats.items():
+        for caller, (_, _, _, cumulative) in callers.items():
+            callees.setdefault(caller, []).append((function, cumulative))
+    # the profiler's own disable call is left out
+    roots = [function for function, entry in stats.stats.items()
+             if not entry[4] and '_lsprof' not in function[2]]
+    lines = {}
+
+    def walk(function, stack, share):
+        _, _, own, cumulative, _ = stats.stats[function]
+        stack = stack + [_label(function)]
+        if own * share > 0:
+            key = ';'.join(stack)
+            lines[key] = lines.get(key, 0) + own * share
+        for callee, edge in callees.get(function, []):
+            callee_total = stats.stats[callee][3]
+            if callee_total and _label(callee) not in stack:
+                walk(callee, stack, share * min(1, edge / callee_total))
+
+    for root in roots:
+        walk(root, [], 1)
+    return ['{} {}'.format(stack, round(seconds * 1e6))
+            for stack, seconds in sorted(lines.items())
+            if round(seconds * 1e6)]
+
+
+def _label(function):
+    filename, line, name = function
+    if filename == '~':
+        return name  # a builtin
+    return '{}:{}'.format(filename.replace('\\', '/').split('/')[-1], name)
+
+
+def solver_breakdown(stats, solvers):
+    '''Returns rows of (solver, calls, own seconds, cumulative seconds) for
+    the solvers that were called, slowest first.'''
+    rows = []
+    for function in solvers:
+        if function in stats.stats:
+            calls, _, own, cumulative, _ = stats.stats[function]
+            rows.append((_label(function), calls, own, cumulative))
+    return sorted(rows, key=lambda x: -x[3])
+
+
+def main(args):
+    solvers = unwrap_probes()
+    records = read_capture(args.path)
+    records.sort(key=lambda x: -x['elapsed_ms'])
+    records = records[:args.top]
+    if not records:
+        print('no calls captured in', args.path)
+        return
+    profile, times = replay(records, args.warm)
+
+    print('captured ms  replayed ms  reason   hand size')
+    for record, replayed in zip(records, times):
+        print('{:>11.2f} {:>12.2f}  {:<8} {:>9}'.format(
+            record['elapsed_ms'], replayed, record['reason'],
+            len(record['args'][4])))
+
+    stats = pstats.Stats(profile)
+    total = sum(times) / 1000
+    print()
+    print('{:<40} {:>7} {:>9} {:>9} {:>7}'.format(
+        'solver', 'calls', 'own ms', 'cum ms', '% cum'))
+    for label, calls, own, cumulative in solver_breakdown(stats, solvers):
+        print('{:<40} {:>7} {:>9.2f} {:>9.2f} {:>7.1f}'.format(
+            label, calls, own * 1000, cumulative * 1000,
+            100 * cumulative / total if total else 0))
+
+    collapsed = args.collapsed or args.path + '.collapsed'
+    with open(collapsed, 'w') as file:
+        file.write('\n'.join(collapsed_stacks(stats)) + '\n')
+    print()
+    print('collapsed stacks written to', collapsed)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('path', help='capture file')
+    parser.add_argument('--top', type=int, default=TOP,
+                        help='number of the slowest calls to replay')
+    parser.add_argument('--warm', action='store_true',
+                        help='fill the caches before profiling each call')
+    parser.add_argument('--collapsed', help='where to write the stacks')
+    main(parser.parse_args())
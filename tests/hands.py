@@ -0,0 +1,21 @@
+# Contains the random hands shared by the tests that compare two solvers.
+
+import random
+from phazed.constants import *
+from phazed.rules import RULES
+
+NUM_HANDS = 500
+
+
+def random_hands(seed, num_hands=NUM_HANDS):
+    '''Returns `num_hands` random hands of up to RULES.large_hand cards.
+    Each hand is dealt from the Aces and a few other values, so that most
+    phases come up often.'''
+    rng = random.Random(seed)
+    hands = []
+    for _ in range(num_hands):
+        values = rng.sample(RUN_ORDER, rng.randint(3, len(RUN_ORDER))) + ['A']
+        deck = [value + suit for value in values for suit in SUITS
+                for _ in range(RULES.num_decks)]
+        hands.append(rng.sample(deck, rng.randint(8, RULES.large_hand)))
+    return hands
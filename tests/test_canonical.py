@@ -0,0 +1,40 @@
+# Contains tests that check the cached, canonical solver path against the
+# solvers called on the real hand.
+
+import pytest
+from collections import Counter
+from phazed.constants import *
+from phazed.phase_type import phazed_phase_type
+from phazed.player import possible_phase, find_phase
+from hands import random_hands
+
+SEED = 31001
+
+
+def check_play(phase, hand):
+    '''Checks that the canonical path finds a play for `hand` exactly when
+    the solver does on the real hand, and that the play is valid.'''
+    play = possible_phase(0, [phase - 1], hand)
+    assert bool(play) == bool(find_phase(phase, tuple(hand))), (hand, play)
+    if play:
+        assert phase in phazed_phase_type(play), (hand, play)
+        cards = Counter(card for group in play for card in group)
+        assert not cards - Counter(hand), (hand, play)
+
+
+@pytest.mark.parametrize('phase', range(PHASE_ONE, PHASE_SEVEN + 1))
+def test_canonical_agrees_with_solver(phase):
+    for hand in random_hands(SEED + phase):
+        check_play(phase, hand)
+
+
+def test_second_accumulation_after_any_first():
+    hand = ['8D', '8H', '8C', '2C', '6C', 'KS', '6D', 'QS', 'AD', '7H']
+    check_play(PHASE_THREE, hand)
+    assert possible_phase(0, [PHASE_THREE - 1], hand)
+
+
+def test_wilds_keep_their_colour():
+    hand = ['0H', 'JH', 'QH', 'AH', '0S', 'JS', 'QS', 'AS']
+    check_play(PHASE_SIX, hand)
+    assert possible_phase(0, [PHASE_SIX - 1], hand)
@@ -0,0 +1,42 @@
+# Contains tests for the card tracker reading turn_history incrementally.
+
+from phazed.rules import RULES
+from phazed.card_tracker import CardTracker, card_tracker, _trackers
+
+GAME_A = [(0, [(1, None), (5, 'KH')]), (1, [(1, None), (5, 'KD')]),
+          (0, [(1, None), (5, 'KS')])]
+GAME_B = [(0, [(1, None), (5, '2C')]), (1, [(1, None), (5, '5H')]),
+          (0, [(1, None), (5, '7S')]), (1, [(1, None), (5, '9D')])]
+
+
+def fresh_tracker(turn_history):
+    tracker = CardTracker(1)
+    tracker.update(turn_history)
+    return tracker
+
+
+def test_other_game_starts_again():
+    _trackers.clear()
+    card_tracker(1, GAME_A)
+    tracker = card_tracker(1, GAME_B)
+    assert tracker.unseen == fresh_tracker(GAME_B).unseen
+
+
+def test_plays_added_to_the_last_turn_are_read():
+    turn_history = [(0, [(1, None), (5, 'KH')]), (1, [(1, None)])]
+    tracker = fresh_tracker(turn_history)
+    turn_history[1][1].append((5, 'KD'))
+    turn_history.append((2, [(2, 'KD'), (5, '3C')]))
+    tracker.update(turn_history)
+    assert tracker.unseen == fresh_tracker(turn_history).unseen
+
+
+def test_new_hand_reads_the_number_of_decks():
+    tracker = CardTracker(1)
+    num_decks = RULES.num_decks
+    RULES.update(num_decks=num_decks + 1)
+    try:
+        tracker.reset()
+        assert tracker.unseen['KH'] == num_decks + 1
+    finally:
+        RULES.update(num_decks=num_decks)
@@ -0,0 +1,93 @@
+# Contains tests for applying plays to a GameState.
+
+import copy
+import pytest
+from phazed.constants import *
+from phazed.game_state import GameState
+
+HAND = ['2C', '2D', '2H', '7S', 'KD', 'AC']
+TABLE = [(None, []), (PHASE_ONE, [['5C', '5D', '5H'], ['9S', '9C', 'AD']])]
+TURN_HISTORY = [(1, [(PLAY_ONE, None),
+                     (PLAY_THREE, (PHASE_ONE, [['5C', '5D', '5H'],
+                                               ['9S', '9C', 'AD']])),
+                     (PLAY_FIVE, '3S')])]
+ARGS = (0, TABLE, TURN_HISTORY, [0, 1], HAND, '3S')
+
+
+def start_state():
+    return GameState.from_args(*copy.deepcopy(ARGS))
+
+
+def test_args_round_trip():
+    assert start_state().to_args() == ARGS
+
+
+def test_callers_lists_are_not_changed():
+    args = copy.deepcopy(ARGS)
+    state = GameState.from_args(*args)
+    state.apply((PLAY_TWO, '3S')).apply((PLAY_FOUR, ('AC', (1, 0, 3))))
+    changed = state.to_args()
+    changed[1][1][1][0].append('9H')
+    changed[2][0][1].append((1, None))
+    changed[4].pop()
+    assert args == ARGS
+    assert state.to_args() == ARGS
+
+
+def test_pickup_from_deck():
+    state = start_state()
+    after = state.apply((PLAY_ONE, None), drawn='QH')
+    assert after.hand == tuple(HAND) + ('QH',)
+    assert after.table is state.table
+    assert after.discard == '3S'
+    assert after.history.previous is state.history
+    assert after.turn_history() == TURN_HISTORY + [(0, [(PLAY_ONE, None)])]
+
+
+def test_pickup_from_discard():
+    state = start_state()
+    after = state.apply((PLAY_TWO, '3S'))
+    assert after.hand == tuple(HAND) + ('3S',)
+    assert after.discard is None
+    assert after.table is state.table
+    assert after.history.previous is state.history
+
+
+def test_phase_play():
+    state = start_state().apply((PLAY_ONE, None), drawn='7C')
+    groups = [['2C', '2D', '2H'], ['7S', '7C', 'AC']]
+    after = state.apply((PLAY_THREE, (PHASE_ONE, groups)))
+    assert after.hand == ('KD',)
+    assert after.table[0] == (PHASE_ONE, (('2C', '2D', '2H'),
+                                          ('7S', '7C', 'AC')))
+    assert after.table[1] is state.table[1]
+    # the play is added to this player's turn, before which nothing changes
+    assert after.history.previous is state.history.previous
+    assert after.history.turn[1] == state.history.turn[1] + (
+        (PLAY_THREE, (PHASE_ONE, groups)),)
+
+
+def test_play_to_table():
+    state = start_state()
+    after = state.apply((PLAY_FOUR, ('AC', (1, 1, 3))))
+    assert after.hand == ('2C', '2D', '2H', '7S', 'KD')
+    phase, groups = after.table[1]
+    assert groups[1] == ('9S', '9C', 'AD', 'AC')
+    assert groups[0] is state.table[1][1][0]
+    assert after.table[0] is state.table[0]
+    assert state.table[1][1][1] == ('9S', '9C', 'AD')
+
+
+def test_discard():
+    state = start_state()
+    after = state.apply((PLAY_FIVE, 'KD'))
+    assert after.hand == ('2C', '2D', '2H', '7S', 'AC')
+    assert after.discard == 'KD'
+    assert after.table is state.table
+    assert state.hand == tuple(HAND)
+    assert state.discard == '3S'
+
+
+def test_missing_card_is_an_error():
+    with pytest.raises(ValueError):
+        start_state().apply((PLAY_FIVE, 'QS'))
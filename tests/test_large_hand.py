@@ -0,0 +1,41 @@
+# Contains tests that check the large hand solvers against the searching
+# solvers on hands small enough for both.
+
+import pytest
+from collections import Counter
+from phazed.constants import *
+from phazed.rules import RULES
+from phazed.phase_type import phazed_phase_type
+from phazed.large_hand import large_hand_phase
+from phazed.player import find_phase
+from hands import random_hands
+
+SEED = 30001
+
+
+@pytest.mark.parametrize('phase', range(PHASE_ONE, PHASE_SEVEN + 1))
+def test_large_hand_phase_finds_what_search_finds(phase):
+    # the search doesn't find every play either (it keeps the first set it
+    # comes across), so the large hand solvers may find more
+    for hand in random_hands(SEED + phase):
+        play = large_hand_phase(phase, hand)
+        if find_phase(phase, tuple(hand)):
+            assert play, hand
+        if play:
+            assert phase in phazed_phase_type(play), (hand, play)
+            cards = Counter(card for group in play for card in group)
+            assert not cards - Counter(hand), (hand, play)
+
+
+def test_sets_share_one_value():
+    hand = ['3C', '3H', '3S', '3D', 'AC', 'AD', '5H', '7S', '9D', 'JC', 'KH',
+            'QD', '2S', '4C', '6D']
+    assert large_hand_phase(PHASE_ONE, hand) == [['3C', '3H', 'AC'],
+                                                 ['3S', '3D', 'AD']]
+
+
+def test_run_leaves_the_set():
+    hand = ['3H', '4H', '5H', '6H', '5D', '5C', '5S', '9H', '0H', 'JH', 'QH',
+            '2C', '7C', 'KS']
+    play = large_hand_phase(PHASE_SEVEN, hand)
+    assert phazed_phase_type(play) == [PHASE_SEVEN]
@@ -0,0 +1,22 @@
+# Contains tests that check the distance to each phase against the solvers.
+
+import pytest
+from phazed.constants import *
+from phazed.player import find_phase
+from phazed.phase_distance import phase_distance
+from hands import random_hands
+
+SEED = 26001
+
+
+@pytest.mark.parametrize('phase', range(PHASE_ONE, PHASE_SEVEN + 1))
+def test_no_distance_when_the_phase_is_found(phase):
+    for hand in random_hands(SEED + phase):
+        if find_phase(phase, tuple(hand)):
+            assert phase_distance(hand, phase) == 0, hand
+
+
+def test_set_value_stays_in_the_run():
+    hand = ['0C', 'AH', 'JC', '0S', 'AC', 'AC', '0S', '0H']
+    assert find_phase(PHASE_SEVEN, tuple(hand))
+    assert phase_distance(hand, PHASE_SEVEN) == 0
@@ -0,0 +1,146 @@
+# Tunes the strategy settings of the card player by self-play. Each setting
+# in the grid below is scored by playing it in one seat against the defaults
+# in the other seats, on duplicate deals: every configuration plays the same
+# seeded deals, so luck of the deal cancels out when they are compared. The
+# configurations are then cut down by successive halving: after each round
+# the worse half is dropped and the survivors play twice as many new deals.
+# The defaults are kept as a control through every round, and another
+# configuration is only recommended if it beats them by MIN_Z standard
+# errors. Run with: python tune.py [deals in the first round]
+
+import sys
+from itertools import product
+from phazed.simulate import NUM_PLAYERS, play_hand
+from phazed.strategy import Strategy
+
+# the values tried for each strategy setting
+GRID = {
+    'pickup_value': [4, 5, 6, 7, 8],
+    'pickup_margin': [0.0, 0.25, 0.5, 1.0],
+    'keep_wanted': [True, False],
+    'odds_draws': [0, 1, 3, 5],
+}
+FIRST_DEALS = 8
+SEED = 20001
+PHASE_POINTS = 100  # playing the phase is worth this many card points
+MIN_Z = 2.0  # standard errors a configuration must beat the defaults by
+
+
+def configurations(grid=GRID):
+    '''Returns every combination of the values in `grid`, as tuples of
+    (setting, value) pairs.'''
+    names = sorted(grid)
+    return [tuple(zip(names, values))
+            for values in product(*(grid[name] for name in names))]
+
+
+def default_config(grid=GRID):
+    '''Returns the defaults of the settings in `grid`, in the form of
+    `configurations`.'''
+    defaults = Strategy()
+    return tuple((name, getattr(defaults, name)) for name in sorted(grid))
+
+
+def seat_score(result):
+    '''Scores one player's result from `play_hand`: the phase bonus, less
+    the points left in hand.'''
+    made_phase, points = result
+    return PHASE_POINTS * made_phase - points
+
+
+class Tuner:
+    '''Plays and scores configurations on duplicate deals. The score of a
+    configuration on a deal is its seat score less the score of the default
+    strategy in the same seat on the same deal. The seat moves round with the
+    seed, so every seat gets played.'''
+    def __init__(self):
+        self.baselines = {}
+        self.hands_played = 0
+
+    def score(self, config, seed):
+        defaults = Strategy()
+        if all(getattr(defaults, name) == value for name, value in config):
+            return 0  # the defaults play the same as the baseline
+        seat = seed % NUM_PLAYERS
+        strategies = [Strategy() for _ in range(NUM_PLAYERS)]
+        strategies[seat] = Strategy(**dict(config))
+        results = play_hand(seed, strategies)
+        self.hands_played += 1
+        return seat_score(results[seat]) - self.baseline(seed)
+
+    def baseline(self, seed):
+        '''Returns the score of the defaults in the seat played on `seed`.'''
+        if seed not in self.baselines:
+            results = play_hand(seed, [Strategy() for _ in range(NUM_PLAYERS)])
+            self.hands_played += 1
+            self.baselines[seed] = seat_score(results[seed % NUM_PLAYERS])
+        return self.baselines[seed]
+
+    def successive_halving(self, configs, first_deals=FIRST_DEALS,
+                           seed=SEED, report=print, control=None):
+        '''Returns the best of `configs` and its mean score over the deals it
+        played. Every round, the survivors play the same new deals, and the
+        better half (by mean score over all their deals so far) go through.
+        The `control` configuration (the defaults unless given) goes through
+        every round, and is returned unless the best of the others beats it
+        by MIN_Z standard errors.'''
+        if control is None:
+            control = default_config()
+        scores = {config: [] for config in configs}
+        scores[control] = []
+        challengers = [config for config in configs if config != control]
+        deals = first_deals
+        while challengers:
+            seeds = range(seed, seed + deals)
+            seed += deals
+            for config in challengers + [control]:
+                scores[config] += [self.score(config, s) for s in seeds]
+            challengers.sort(key=lambda x: -_mean(scores[x]))
+            best = challengers[0]
+            report('{:>3} configurations and the control, {:>4} deals each, '
+                   'best {:+.2f} +- {:.2f} {}'.format(
+                       len(challengers), len(scores[best]),
+                       _mean(scores[best]), _std_error(scores[best]),
+                       dict(best)))
+            if len(challengers) == 1:
+                break
+            challengers = challengers[:len(challengers) // 2]
+            deals *= 2
+        if challengers:
+            best = challengers[0]
+            beat_by = _mean(scores[best]) - _mean(scores[control])
+            if beat_by > MIN_Z * _std_error(scores[best]):
+                return best, _mean(scores[best])
+        return control, _mean(scores[control])
+
+
+def _mean(values):
+    return sum(values) / len(values)
+
+
+def _std_error(values):
+    '''Returns the standard error of the mean of `values`.'''
+    if len(values) < 2:
+        return 0
+    mean = _mean(values)
+    variance = sum((x - mean) ** 2 for x in values) / (len(values) - 1)
+    return (variance / len(values)) ** 0.5
+
+
+def main(first_deals):
+    tuner = Tuner()
+    configs = configurations()
+    best, mean = tuner.successive_halving(configs, first_deals)
+    total_deals = len(tuner.baselines)
+    print()
+    if best == default_config():
+        print('nothing beat the defaults: {}'.format(Strategy()))
+    else:
+        print('best: {} ({:+.2f} points a hand over the defaults)'.format(
+            Strategy(**dict(best)), mean))
+    print('hands played: {}, a full grid over the same deals: {}'.format(
+        tuner.hands_played, len(configs) * total_deals))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else FIRST_DEALS)